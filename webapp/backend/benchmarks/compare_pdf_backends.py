@@ -0,0 +1,106 @@
+"""
+Compare the PDF text/table extraction backends on a corpus of PDFs.
+
+For every PDF and backend this reports extraction time, output size, table
+count and how similar the text is to the pdfplumber output (the historical
+baseline). It also shows which backend "auto" ends up choosing.
+
+Usage:
+    python compare_pdf_backends.py path/to/pdf_corpus [--repeat 3] [--json report.json]
+    python compare_pdf_backends.py --synthetic 5    # generate a small fixture corpus first
+"""
+import argparse
+import difflib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Make the backend packages importable, as api/main.py does
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from extraction import pdf_backends
+from pdf_fixtures import make_pdf
+
+BASELINE = pdf_backends.PdfplumberBackend.name
+
+
+def generate_corpus(directory: str, count: int) -> None:
+    """Write `count` synthetic PDFs mixing prose pages and ruled tables."""
+    for i in range(count):
+        make_pdf(os.path.join(directory, f"synthetic_{i:02d}.pdf"), pages=5 + i, title=f"Document {i}", images=False)
+
+
+def _timed(func, repeat: int):
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(durations)
+
+
+def benchmark_file(pdf_path: str, repeat: int) -> dict:
+    report = {"file": os.path.basename(pdf_path), "backends": {}}
+    texts = {}
+    for name in [*pdf_backends.BACKENDS, pdf_backends.AUTO]:
+        (text, used), text_ms = _timed(lambda: pdf_backends.extract_text(pdf_path, name), repeat)
+        with tempfile.TemporaryDirectory() as out_dir:
+            (tables, _), table_ms = _timed(lambda: pdf_backends.extract_tables(pdf_path, out_dir, name), 1)
+        texts[name] = text
+        report["backends"][name] = {
+            "used": used,
+            "text_ms": round(text_ms, 1),
+            "text_chars": len(text),
+            "table_ms": round(table_ms, 1),
+            "tables": tables,
+        }
+    for name, stats in report["backends"].items():
+        stats["similarity_to_baseline"] = round(
+            difflib.SequenceMatcher(None, texts[BASELINE], texts[name], autojunk=False).ratio(), 4
+        )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="Directory containing PDF files")
+    parser.add_argument("--repeat", type=int, default=3, help="Text extraction runs per file (median is reported)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate this many synthetic PDFs to benchmark")
+    parser.add_argument("--json", help="Also write the full report to this file")
+    args = parser.parse_args()
+
+    corpus = args.corpus
+    if args.synthetic:
+        corpus = corpus or tempfile.mkdtemp(prefix="pdf_corpus_")
+        os.makedirs(corpus, exist_ok=True)
+        generate_corpus(corpus, args.synthetic)
+    if not corpus:
+        parser.error("Provide a corpus directory or --synthetic N")
+
+    pdfs = sorted(os.path.join(corpus, f) for f in os.listdir(corpus) if f.lower().endswith(".pdf"))
+    reports = [benchmark_file(path, args.repeat) for path in pdfs]
+
+    print(f"{'file':<28}{'backend':<12}{'used':<12}{'text ms':>9}{'chars':>9}{'table ms':>10}{'tables':>8}{'sim':>8}")
+    for report in reports:
+        for name, stats in report["backends"].items():
+            print(f"{report['file'][:27]:<28}{name:<12}{stats['used']:<12}{stats['text_ms']:>9}"
+                  f"{stats['text_chars']:>9}{stats['table_ms']:>10}{stats['tables']:>8}"
+                  f"{stats['similarity_to_baseline']:>8}")
+
+    print("\nTotals")
+    for name in [*pdf_backends.BACKENDS, pdf_backends.AUTO]:
+        text_ms = sum(r["backends"][name]["text_ms"] for r in reports)
+        table_ms = sum(r["backends"][name]["table_ms"] for r in reports)
+        print(f"  {name:<12} text {text_ms:>10.1f} ms   tables {table_ms:>10.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
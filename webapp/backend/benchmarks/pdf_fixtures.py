@@ -0,0 +1,41 @@
+"""
+Synthetic PDFs shared by the backend benchmark and the load test: prose pages,
+ruled tables on every third page and, optionally, embedded images.
+"""
+import fitz  # PyMuPDF
+
+
+def png_bytes(size: int, seed: int) -> bytes:
+    """A solid-colour PNG whose colour depends on seed."""
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), False)
+    pix.set_rect(pix.irect, ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    return pix.tobytes("png")
+
+
+def make_pdf(path: str, pages: int = 10, title: str = "", images: bool = True) -> None:
+    """
+    Write a PDF of `pages` pages with 30 lines of prose each, a ruled 5x4 table
+    on pages 2, 5, 8, ... and, with images, a PNG on pages 3, 7, 11, ...
+    Lines start with `title` so documents in a corpus differ.
+    """
+    doc = fitz.open()
+    image = png_bytes(64, 7)
+    prefix = f"{title} page" if title else "Page"
+    for p in range(pages):
+        page = doc.new_page()
+        y = 72
+        for line in range(30):
+            page.insert_text((72, y), f"{prefix} {p + 1} line {line}: lorem ipsum dolor sit amet, consectetur.")
+            y += 14
+        if p % 3 == 1:
+            top = y + 20
+            for r in range(6):
+                page.draw_line((72, top + r * 18), (472, top + r * 18))
+                for c in range(4):
+                    page.insert_text((78 + c * 100, top + r * 18 + 13), f"r{r}c{c}")
+            for c in range(5):
+                page.draw_line((72 + c * 100, top), (72 + c * 100, top + 5 * 18))
+        if images and p % 4 == 2:
+            page.insert_image(fitz.Rect(400, 72, 500, 172), stream=image)
+    doc.save(path)
+    doc.close()
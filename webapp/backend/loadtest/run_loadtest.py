@@ -0,0 +1,401 @@
+"""
+End-to-end load test for the FastAPI app in src/api/main.py.
+
+The app runs under uvicorn in a subprocess, the same way the Dockerfile starts
+it. Everything it depends on is replaced by a local stand-in (see stubs.py):
+
+- S3: an in-process moto server (default), an existing MinIO endpoint, or the
+  local filesystem storage backend
+- Diffbot: a stub /v3/analyze endpoint with configurable latency
+- scraped sites: a generated static site served over HTTP
+
+A pool of closed-loop clients sends a weighted mix of the endpoints for a fixed
+duration. Samples from the warm-up period are discarded. The report gives
+p50/p90/p99 latency, throughput and a status breakdown per endpoint. The JSON
+report records the git commit, so runs can be compared across commits with
+--compare.
+
+Usage:
+    python run_loadtest.py --duration 60 --concurrency 8 --json report.json
+    python run_loadtest.py --mix upload_pdf_opensource=1,scrape_webpage=4 --duration 30
+    python run_loadtest.py --s3 minio --s3-endpoint http://localhost:9000 --json report.json
+    python run_loadtest.py --json new.json --compare report.json
+    python run_loadtest.py --app-env ADMISSION_SCRAPE_WEBPAGE_CONCURRENCY=8 --json tuned.json
+
+The scraper's HTTP cache is off unless --scrape-cache is given: the mix hits the
+same site pages over and over, so with the cache on scrape latencies mostly
+measure cache hits.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(BACKEND_DIR, "src", "api")
+BUCKET = "bigdata-project1-storage"
+DEFAULT_MIX = "upload_pdf_opensource=2,scrape_webpage=4,crawl_webpage=1,scrape_diffbot=3"
+
+
+class Context:
+    """Fixtures shared by the request builders."""
+
+    def __init__(self, site_url: str, pdfs: List[bytes], site_pages: int, seed: int):
+        self.site_url = site_url
+        self.pdfs = pdfs
+        self.site_pages = site_pages
+        self.seed = seed
+        self.local = threading.local()
+
+    def seed_client(self, client_index: int) -> None:
+        """Give each client thread its own reproducible random stream."""
+        self.local.rng = random.Random(f"{self.seed}-{client_index}")
+
+    def rng(self) -> random.Random:
+        return self.local.rng
+
+    def page_url(self) -> str:
+        return f"{self.site_url}/page_{self.rng().randrange(self.site_pages)}.html"
+
+
+def _pdf_request(ctx: Context) -> Dict[str, Any]:
+    data = ctx.rng().choice(ctx.pdfs)
+    return {"files": {"file": ("loadtest.pdf", data, "application/pdf")}, "data": {"bucket_name": BUCKET}}
+
+
+def _scrape_request(ctx: Context) -> Dict[str, Any]:
+    return {"data": {"url": ctx.page_url(), "download_images": "true", "bucket_name": BUCKET}}
+
+
+def _crawl_request(ctx: Context) -> Dict[str, Any]:
+    return {"data": {"url": f"{ctx.site_url}/index.html", "max_depth": 1, "max_pages": 10, "bucket_name": BUCKET}}
+
+
+def _diffbot_request(ctx: Context) -> Dict[str, Any]:
+    return {"data": {"url": ctx.page_url(), "bucket_name": BUCKET}}
+
+
+# upload_pdf_enterprise is left out: it calls Adobe PDF Services, which has no local stand-in.
+ENDPOINTS: Dict[str, Callable[[Context], Dict[str, Any]]] = {
+    "upload_pdf_opensource": _pdf_request,
+    "scrape_webpage": _scrape_request,
+    "crawl_webpage": _crawl_request,
+    "scrape_diffbot": _diffbot_request,
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}'. Choose from: {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("At least one endpoint needs a positive weight")
+    return mix
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(env: Dict[str, str], port: int, work_dir: str, log_path: str) -> subprocess.Popen:
+    """
+    Run uvicorn on main:app. The working directory is a scratch dir because some
+    handlers write intermediate files (e.g. scraped_data.md) into it.
+    """
+    log = open(log_path, "wb")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", API_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode} during startup")
+        try:
+            if requests.get(f"{base_url}/metrics", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"App did not become ready within {timeout:.0f}s")
+
+
+def drive_load(base_url: str, ctx: Context, mix: Dict[str, float], concurrency: int, duration: float,
+               warmup: float, timeout: float) -> Dict[str, Any]:
+    """
+    Closed-loop clients: each sends its next request as soon as the previous one
+    finishes. Every request sent inside the measured window is counted, even if
+    it completes after the window closes, so slow requests are not dropped.
+    """
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    samples: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def client(client_index: int) -> None:
+        ctx.seed_client(client_index)
+        session = requests.Session()
+        rng = ctx.rng()
+        while time.monotonic() < stop_at:
+            name = rng.choices(names, weights)[0]
+            kwargs = ENDPOINTS[name](ctx)
+            sent = time.monotonic()
+            try:
+                response = session.post(f"{base_url}/{name}", timeout=timeout, **kwargs)
+                status = response.status_code
+                # Handlers report failures as 200 {"status": "error"}; count those as errors
+                if status == 200 and response.json().get("status") == "error":
+                    status = "app_error"
+            except (requests.RequestException, ValueError) as e:
+                status = type(e).__name__
+            finished = time.monotonic()
+            if sent >= measure_from:
+                with lock:
+                    samples.append({"endpoint": name, "status": status, "latency_ms": (finished - sent) * 1000})
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(client, client_index) for client_index in range(concurrency)]
+        for future in futures:
+            future.result()
+
+    return summarize(samples, duration)
+
+
+def _stats(samples: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    ok = [s["latency_ms"] for s in samples if s["status"] == 200]
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "shed": statuses.get("429", 0) + statuses.get("503", 0),
+        "errors": len(samples) - len(ok) - statuses.get("429", 0) - statuses.get("503", 0),
+        "statuses": statuses,
+        "throughput_rps": round(len(ok) / duration, 3),
+        # Latencies cover successful requests only; shed requests return almost instantly
+        "p50_ms": _round(percentile(ok, 50)),
+        "p90_ms": _round(percentile(ok, 90)),
+        "p99_ms": _round(percentile(ok, 99)),
+        "mean_ms": _round(statistics.fmean(ok) if ok else None),
+        "max_ms": _round(max(ok) if ok else None),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def summarize(samples: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    endpoints = sorted({s["endpoint"] for s in samples})
+    return {
+        "endpoints": {name: _stats([s for s in samples if s["endpoint"] == name], duration) for name in endpoints},
+        "overall": _stats(samples, duration),
+    }
+
+
+def git_revision() -> Dict[str, Optional[str]]:
+    def run(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": run("rev-parse", "HEAD"), "describe": run("describe", "--always", "--dirty")}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    rows = {**report["results"]["endpoints"], "overall": report["results"]["overall"]}
+    print(f"\nCommit {report['git']['describe']}  duration {report['config']['duration']}s  "
+          f"concurrency {report['config']['concurrency']}  s3 {report['config']['s3']}")
+    print(f"{'endpoint':<24}{'reqs':>7}{'ok':>7}{'shed':>6}{'err':>6}{'rps':>9}"
+          f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in rows.items():
+        print(f"{name:<24}{s['requests']:>7}{s['ok']:>7}{s['shed']:>6}{s['errors']:>6}{s['throughput_rps']:>9}"
+              f"{_fmt(s['p50_ms']):>10}{_fmt(s['p90_ms']):>10}{_fmt(s['p99_ms']):>10}{_fmt(s['max_ms']):>10}")
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Relative change against a previous report; negative latency / positive throughput is better."""
+    print(f"\nCompared with {baseline['git']['describe']} ({baseline['timestamp']})")
+    if baseline["config"] != report["config"]:
+        print("Note: the baseline was run with a different configuration")
+    print(f"{'endpoint':<24}{'rps':>16}{'p50 ms':>20}{'p99 ms':>20}")
+    current = {**report["results"]["endpoints"], "overall": report["results"]["overall"]}
+    previous = {**baseline["results"]["endpoints"], "overall": baseline["results"]["overall"]}
+    for name, s in current.items():
+        old = previous.get(name)
+        if old is None:
+            print(f"{name:<24}  (not in baseline)")
+            continue
+        print(f"{name:<24}{_delta(old['throughput_rps'], s['throughput_rps']):>16}"
+              f"{_delta(old['p50_ms'], s['p50_ms']):>20}{_delta(old['p99_ms'], s['p99_ms']):>20}")
+
+
+def _delta(old: Optional[float], new: Optional[float]) -> str:
+    if old is None or new is None:
+        return f"{_fmt(old)} -> {_fmt(new)}"
+    change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+    return f"{new:.1f} ({change})"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Endpoint weights, e.g. '{DEFAULT_MIX}'")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring starts")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--s3", choices=["moto", "minio", "local"], default="moto", help="Storage stand-in")
+    parser.add_argument("--s3-endpoint", help="S3-compatible endpoint for --s3 minio")
+    parser.add_argument("--diffbot-latency-ms", type=float, default=200.0, help="Simulated Diffbot API latency")
+    parser.add_argument("--site-pages", type=int, default=20, help="Pages in the generated static site")
+    parser.add_argument("--pdf-pages", default="5,20", help="Page counts of the PDFs that get uploaded")
+    parser.add_argument("--scrape-cache", action="store_true",
+                        help="Keep the scraper's HTTP cache on (repeated URLs then measure cache hits)")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the app, e.g. admission limits (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the request mix")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+    if args.s3 == "minio" and not args.s3_endpoint:
+        parser.error("--s3 minio needs --s3-endpoint")
+
+    work_dir = tempfile.mkdtemp(prefix="loadtest_")
+    stoppers = []
+    app = None
+    try:
+        site_dir = os.path.join(work_dir, "site")
+        stubs.generate_site(site_dir, pages=args.site_pages)
+        site_server, site_url = stubs.start_static_site(site_dir)
+        diffbot_server, diffbot_url = stubs.start_diffbot_stub(args.diffbot_latency_ms)
+        stoppers += [site_server.shutdown, diffbot_server.shutdown]
+
+        pdfs = []
+        for i, pages in enumerate(int(p) for p in args.pdf_pages.split(",")):
+            path = os.path.join(work_dir, f"fixture_{i}.pdf")
+            stubs.make_pdf(path, pages)
+            with open(path, "rb") as f:
+                pdfs.append(f.read())
+
+        env = {
+            **os.environ,
+            "DIFFBOT_API_URL": diffbot_url,
+            "DIFFBOT_TOKEN": "loadtest",
+            "MANIFEST_DB_PATH": os.path.join(work_dir, "manifest.sqlite3"),
+            "STORAGE_BACKEND": "local" if args.s3 == "local" else "s3",
+            "LOCAL_STORAGE_ROOT": os.path.join(work_dir, "storage"),
+            # Keep the app's on-disk state inside work_dir so runs neither share nor leave it behind
+            "SCRAPE_CACHE": "1" if args.scrape_cache else "0",
+            "SCRAPE_CACHE_DIR": os.path.join(work_dir, "scrape_cache"),
+            "UPLOAD_STAGING_DIR": os.path.join(work_dir, "upload_staging"),
+        }
+        env.pop("MANIFEST_BUCKET", None)
+        if args.s3 == "moto":
+            moto_server, s3_endpoint = stubs.start_moto_server()
+            stoppers.append(moto_server.stop)
+            env.update(AWS_ACCESS_KEY_ID="testing", AWS_SECRET_ACCESS_KEY="testing")
+        else:
+            s3_endpoint = args.s3_endpoint
+        if args.s3 != "local":
+            env.update(AWS_ENDPOINT_URL=s3_endpoint, AWS_DEFAULT_REGION=env.get("AWS_DEFAULT_REGION", "us-east-1"))
+            stubs.ensure_bucket(s3_endpoint, BUCKET, env["AWS_DEFAULT_REGION"],
+                                env.get("AWS_ACCESS_KEY_ID"), env.get("AWS_SECRET_ACCESS_KEY"))
+        for item in args.app_env:
+            key, _, value = item.partition("=")
+            env[key] = value
+
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        app_log = os.path.join(work_dir, "app.log")
+        app = start_app(env, port, work_dir, app_log)
+        wait_until_ready(base_url, app)
+
+        print(f"Running {args.duration:.0f}s (+{args.warmup:.0f}s warm-up) with {args.concurrency} clients: "
+              + ", ".join(f"{k}={v:g}" for k, v in args.mix.items()))
+        ctx = Context(site_url, pdfs, args.site_pages, args.seed)
+        results = drive_load(base_url, ctx, args.mix, args.concurrency, args.duration, args.warmup, args.timeout)
+        app_metrics = requests.get(f"{base_url}/metrics", timeout=10).json()
+
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "host": {"python": platform.python_version(), "platform": platform.platform(),
+                     "cpu_count": os.cpu_count()},
+            "config": {
+                "mix": args.mix, "concurrency": args.concurrency, "duration": args.duration,
+                "warmup": args.warmup, "s3": args.s3, "diffbot_latency_ms": args.diffbot_latency_ms,
+                "site_pages": args.site_pages, "pdf_pages": args.pdf_pages, "scrape_cache": args.scrape_cache,
+                "app_env": args.app_env,
+                "seed": args.seed,
+            },
+            "results": results,
+            "app_metrics": app_metrics,
+        }
+        print_report(report)
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                print_comparison(report, json.load(f))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    finally:
+        if app is not None:
+            app.terminate()
+            try:
+                app.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                app.kill()
+        for stop in stoppers:
+            stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Local stand-ins for the services the API talks to during a load test:
+
+- a static HTTP site with linked pages, tables and images (replaces scraped sites)
+- a Diffbot "analyze" stub returning canned JSON (replaces api.diffbot.com)
+- an S3 endpoint: an in-process moto server, or an existing MinIO/S3-compatible URL
+
+Every server binds to 127.0.0.1 on an ephemeral port and runs in a daemon thread.
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import boto3
+
+# PDF and image fixtures are shared with the backend benchmark (run_loadtest uses stubs.make_pdf)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from pdf_fixtures import make_pdf, png_bytes
+
+
+class _QuietStaticHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server(server: ThreadingHTTPServer) -> str:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def generate_site(directory: str, pages: int = 20, paragraphs: int = 30, table_rows: int = 25) -> None:
+    """
+    Write a small static site: index.html links to page_<n>.html, and every page
+    carries prose, a table, an image and links to its neighbours.
+    """
+    os.makedirs(os.path.join(directory, "img"), exist_ok=True)
+    with open(os.path.join(directory, "robots.txt"), "w", encoding="utf-8") as f:
+        f.write("User-agent: *\nAllow: /\n")
+
+    links = "".join(f'<li><a href="page_{i}.html" title="Page {i}">Page {i}</a></li>' for i in range(pages))
+    with open(os.path.join(directory, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f"<html><head><title>Load test site</title></head><body><h1>Index</h1><ul>{links}</ul></body></html>")
+
+    for i in range(pages):
+        with open(os.path.join(directory, "img", f"figure_{i}.png"), "wb") as f:
+            f.write(png_bytes(32 + i % 4 * 16, i))
+        prose = "".join(
+            f"<p>Page {i} paragraph {p}: lorem ipsum dolor sit amet, consectetur adipiscing elit, "
+            f"sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.</p>"
+            for p in range(paragraphs)
+        )
+        header = "<tr><th>Item</th><th>Quantity</th><th>Price</th></tr>"
+        rows = "".join(f"<tr><td>item-{i}-{r}</td><td>{r}</td><td>{r * 1.5:.2f}</td></tr>" for r in range(table_rows))
+        neighbours = "".join(
+            f'<a href="page_{j % pages}.html">Next {j % pages}</a> ' for j in (i + 1, i + 2)
+        )
+        html = (
+            f"<html><head><title>Page {i}</title><style>p {{ margin: 0 }}</style></head><body>"
+            f"<h1>Page {i}</h1>{prose}"
+            f'<img src="img/figure_{i}.png" alt="Figure {i}" width="64" height="64">'
+            f"<table>{header}{rows}</table>"
+            f'<nav><a href="index.html">Home</a> {neighbours}</nav>'
+            f"</body></html>"
+        )
+        with open(os.path.join(directory, f"page_{i}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def start_static_site(directory: str) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve `directory` over HTTP; returns (server, base URL)."""
+    handler = functools.partial(_QuietStaticHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    return server, _start_server(server)
+
+
+class _DiffbotHandler(BaseHTTPRequestHandler):
+    latency_seconds = 0.0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        if not query.get("token"):
+            self._send(401, {"errorCode": 401, "error": "Not authorized API token."})
+            return
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        url = query.get("url", [""])[0]
+        self._send(200, {
+            "request": {"pageUrl": url, "api": "analyze", "version": 3},
+            "humanLanguage": "en",
+            "type": "article",
+            "objects": [{
+                "type": "article",
+                "title": f"Stub article for {url}",
+                "pageUrl": url,
+                "text": "Lorem ipsum dolor sit amet. " * 200,
+                "images": [{"url": f"{url.rstrip('/')}/img/figure_0.png", "primary": True}],
+            }],
+        })
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_diffbot_stub(latency_ms: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve a fake /v3/analyze endpoint that sleeps latency_ms to mimic the remote API.
+    Returns (server, value for DIFFBOT_API_URL).
+    """
+    handler = type("DiffbotHandler", (_DiffbotHandler,), {"latency_seconds": latency_ms / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    return server, f"{_start_server(server)}/v3/analyze"
+
+
+def start_moto_server():
+    """Start an in-process moto S3 server; returns (server, endpoint URL)."""
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # per-request access log
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f"http://{host}:{port}"
+
+
+def ensure_bucket(endpoint_url: str, bucket_name: str, region: Optional[str] = None,
+                  access_key: Optional[str] = None, secret_key: Optional[str] = None) -> None:
+    """Create the bucket on a moto/MinIO endpoint if it does not exist yet."""
+    s3 = boto3.client("s3", endpoint_url=endpoint_url, region_name=region or "us-east-1",
+                      aws_access_key_id=access_key, aws_secret_access_key=secret_key)
+    existing = {b["Name"] for b in s3.list_buckets().get("Buckets", [])}
+    if bucket_name not in existing:
+        s3.create_bucket(Bucket=bucket_name)
@@ -0,0 +1,211 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date, datetime, time as dt_time, timezone
+from typing import Any, Dict, List, Optional
+
+from S3.storage_backends import get_storage_backend
+from utils.paths import ensure_private_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "document_manifest", "document_manifest.sqlite3")
+SNAPSHOT_KEY = "manifest/document_manifest.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT NOT NULL,
+    input_sha256 TEXT NOT NULL,
+    input_size INTEGER,
+    bucket TEXT NOT NULL,
+    s3_key TEXT NOT NULL,
+    output_size INTEGER,
+    parser TEXT NOT NULL,
+    duration_ms REAL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_file_name ON documents (file_name);
+CREATE INDEX IF NOT EXISTS idx_documents_input_sha256 ON documents (input_sha256);
+CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents (created_at);
+"""
+
+
+def sha256_of(data) -> str:
+    """Hex SHA-256 of bytes or of a UTF-8 string (e.g. a scraped URL)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _parse_bound(label: str, value: str, end_of_day: bool) -> str:
+    """
+    Normalize a since/until filter to the stored created_at format (UTC, seconds)
+    so string comparison in SQLite is also chronological. A bare date covers the
+    whole day.
+    """
+    value = value.strip()
+    try:
+        if len(value) == 10:
+            moment = datetime.combine(date.fromisoformat(value), dt_time.max if end_of_day else dt_time.min,
+                                      tzinfo=timezone.utc)
+        else:
+            if value.endswith(("Z", "z")):
+                value = value[:-1] + "+00:00"
+            moment = datetime.fromisoformat(value)
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError(f"Invalid '{label}' value {value!r}: expected an ISO-8601 date or datetime")
+    return moment.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+class ManifestIndex:
+    """
+    Local SQLite index of every processed document, so past results can be
+    looked up by name, input hash or date range without listing the bucket.
+
+    The database lives in a private directory (see ensure_private_dir). It is
+    periodically snapshotted to the storage backend (see snapshot_interval) and
+    can be restored from that snapshot when a fresh container starts.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, snapshot_bucket: Optional[str] = None,
+                 snapshot_interval: Optional[float] = None, storage=None):
+        self.db_path = db_path or os.environ.get("MANIFEST_DB_PATH", DEFAULT_DB_PATH)
+        ensure_private_dir(os.path.dirname(os.path.abspath(self.db_path)))
+        self.storage = storage or get_storage_backend()
+        self.snapshot_bucket = snapshot_bucket or os.environ.get("MANIFEST_BUCKET")
+        if snapshot_interval is None:
+            snapshot_interval = float(os.environ.get("MANIFEST_SNAPSHOT_INTERVAL", "300"))
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stop = threading.Event()
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+    def _ensure_snapshot_thread(self) -> None:
+        """Snapshots run on a background timer so record() never waits on storage."""
+        if self.snapshot_bucket and self._snapshot_thread is None:
+            self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name="manifest-snapshot",
+                                                     daemon=True)
+            self._snapshot_thread.start()
+
+    def _snapshot_loop(self) -> None:
+        while not self._stop.wait(self.snapshot_interval):
+            if self._dirty:
+                try:
+                    self.snapshot_to_s3()
+                except Exception as e:
+                    logger.warning(f"Manifest snapshot failed: {e}")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.snapshot_bucket and not os.path.exists(self.db_path):
+                self.restore_from_s3()
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def record(self, file_name: str, input_sha256: str, bucket: str, s3_key: str, parser: str,
+               input_size: Optional[int] = None, output_size: Optional[int] = None,
+               duration_ms: Optional[float] = None) -> int:
+        """Insert one processed document and return its row id."""
+        created_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "INSERT INTO documents (file_name, input_sha256, input_size, bucket, s3_key, "
+                "output_size, parser, duration_ms, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_name, input_sha256.lower(), input_size, bucket, s3_key, output_size, parser,
+                 duration_ms, created_at),
+            )
+            conn.commit()
+            self._dirty = True
+            self._ensure_snapshot_thread()
+        return cursor.lastrowid
+
+    def find(self, file_name: Optional[str] = None, input_sha256: Optional[str] = None,
+             since: Optional[str] = None, until: Optional[str] = None,
+             limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Look up documents, newest first. All filters are optional and combined with AND.
+        since/until are inclusive ISO-8601 dates or datetimes; datetimes without an
+        offset are taken as UTC. Raises ValueError for values that cannot be parsed.
+        """
+        clauses, params = [], []
+        if file_name:
+            clauses.append("file_name = ?")
+            params.append(file_name)
+        if input_sha256:
+            clauses.append("input_sha256 = ?")
+            params.append(input_sha256.lower())
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(_parse_bound("since", since, end_of_day=False))
+        if until:
+            clauses.append("created_at <= ?")
+            params.append(_parse_bound("until", until, end_of_day=True))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(max(1, min(limit, 1000)))
+
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT * FROM documents {where} ORDER BY created_at DESC, id DESC LIMIT ?", params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def snapshot_to_s3(self, bucket: Optional[str] = None, key: str = SNAPSHOT_KEY) -> None:
+        """Upload a consistent copy of the database to the storage backend using SQLite's online backup."""
+        bucket = bucket or self.snapshot_bucket
+        if not bucket:
+            return
+        fd, snapshot_path = tempfile.mkstemp(suffix=".sqlite3", dir=os.path.dirname(os.path.abspath(self.db_path)))
+        os.close(fd)
+        try:
+            with self._lock:
+                snapshot = sqlite3.connect(snapshot_path)
+                self._connection().backup(snapshot)
+                snapshot.close()
+                self._dirty = False
+            self.storage.upload(bucket, key, snapshot_path)
+        finally:
+            os.remove(snapshot_path)
+
+    def restore_from_s3(self, bucket: Optional[str] = None, key: str = SNAPSHOT_KEY) -> bool:
+        """Download the stored snapshot to db_path. Returns False if there is none yet."""
+        bucket = bucket or self.snapshot_bucket
+        if not bucket:
+            return False
+        part_path = self.db_path + ".part"
+        try:
+            self.storage.download(bucket, key, part_path)
+            os.replace(part_path, self.db_path)
+            return True
+        except Exception as e:
+            logger.info(f"No manifest snapshot restored from {self.storage.name}://{bucket}/{key}: {e}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            return False
+
+    def close(self) -> None:
+        """Stop the snapshot timer, flush a final snapshot if anything changed, then close the connection."""
+        self._stop.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+        if self._dirty and self.snapshot_bucket:
+            try:
+                self.snapshot_to_s3()
+            except Exception as e:
+                logger.warning(f"Manifest snapshot failed: {e}")
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
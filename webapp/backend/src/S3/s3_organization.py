@@ -2,6 +2,7 @@ import boto3
 from botocore.exceptions import ClientError
 from typing import Union
 from datetime import datetime
+import uuid
 
 def generate_presigned_url(bucket: str, key: str, expiration=3600) -> str:
     """Generate a presigned URL for downloading from S3 with enterprise-level security configuration."""
@@ -37,9 +38,10 @@ def upload_to_s3(bucket_name: str, s3_key: str, data: Union[bytes, str]) -> None
 def generate_s3_key(file_type: str, file_name: str) -> str:
     """
     Generate an S3 key for storing files.
+    A short random suffix keeps keys unique when the same file name is uploaded twice in one second.
     """
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    return f"{file_type}/{timestamp}_{file_name}"
+    return f"{file_type}/{timestamp}_{uuid.uuid4().hex[:8]}_{file_name}"
 
 def download_from_s3(bucket_name: str, object_name: str, file_path: str) -> None:
     """
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+from S3.s3_organization import upload_to_s3, download_from_s3, generate_presigned_url
+
+
+class S3Backend:
+    """Store artifacts in AWS S3 (the production backend)."""
+
+    name = "s3"
+
+    def upload(self, bucket_name: str, s3_key: str, data: Union[bytes, str]) -> None:
+        upload_to_s3(bucket_name, s3_key, data)
+
+    def download(self, bucket_name: str, s3_key: str, file_path: str) -> None:
+        download_from_s3(bucket_name, s3_key, file_path)
+
+    def presigned_url(self, bucket_name: str, s3_key: str, expiration: int = 3600) -> str:
+        # Presigning is a local signature computation, so it works before the object exists.
+        return generate_presigned_url(bucket_name, s3_key, expiration)
+
+
+class LocalFilesystemBackend:
+    """
+    Store artifacts under <root>/<bucket>/<key> on the local disk, so the whole
+    flow can run and be tested without AWS credentials.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None, base_url: Optional[str] = None):
+        self.root = Path(root or os.environ.get("LOCAL_STORAGE_ROOT",
+                                                os.path.join(tempfile.gettempdir(), "local_storage")))
+        self.base_url = base_url or os.environ.get("LOCAL_STORAGE_BASE_URL")
+
+    def _path(self, bucket_name: str, s3_key: str) -> Path:
+        path = (self.root / bucket_name / s3_key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Invalid storage key: {s3_key}")
+        return path
+
+    def upload(self, bucket_name: str, s3_key: str, data: Union[bytes, str]) -> None:
+        path = self._path(bucket_name, s3_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".part")
+        if isinstance(data, bytes):
+            tmp_path.write_bytes(data)
+        else:
+            shutil.copyfile(data, tmp_path)
+        os.replace(tmp_path, path)
+
+    def download(self, bucket_name: str, s3_key: str, file_path: str) -> None:
+        shutil.copyfile(self._path(bucket_name, s3_key), file_path)
+
+    def presigned_url(self, bucket_name: str, s3_key: str, expiration: int = 3600) -> str:
+        if self.base_url:
+            return f"{self.base_url.rstrip('/')}/{bucket_name}/{s3_key}"
+        return self._path(bucket_name, s3_key).as_uri()
+
+
+def get_storage_backend():
+    """Select the storage backend from STORAGE_BACKEND ("s3" by default, or "local")."""
+    backend = os.environ.get("STORAGE_BACKEND", "s3").lower()
+    if backend == "local":
+        return LocalFilesystemBackend()
+    if backend == "s3":
+        return S3Backend()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
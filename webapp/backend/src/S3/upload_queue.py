@@ -0,0 +1,192 @@
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple, Union
+
+from utils.paths import ensure_private_dir
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+UPLOADING = "uploading"
+DURABLE = "durable"
+FAILED = "failed"
+
+MAX_TRACKED_UPLOADS = 10000
+DEFAULT_STAGING_DIR = os.path.join(tempfile.gettempdir(), "upload_staging")
+
+
+class UploadQueue:
+    """
+    Write-behind uploader: artifacts are staged on local disk and uploaded by a
+    bounded pool of background threads with retries, so request handlers can
+    respond before storage has acknowledged the write.
+
+    submit() returns immediately with a status record; status() reports when
+    the object has become durable (or why it failed).
+
+    Each staged artifact (<id>.data) has a sidecar (<id>.json) holding its bucket
+    and key. Both stay in the staging directory (UPLOAD_STAGING_DIR) until the
+    upload has succeeded or failed for good, and uploads left there by a previous
+    process are queued again at startup. The directory must belong to a single
+    running service instance.
+    """
+
+    def __init__(self, backend, max_workers: Optional[int] = None, max_retries: Optional[int] = None,
+                 backoff_seconds: float = 0.5, staging_dir: Optional[str] = None):
+        self.backend = backend
+        self.max_workers = max_workers or int(os.environ.get("UPLOAD_QUEUE_WORKERS", "4"))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("UPLOAD_QUEUE_RETRIES", "3"))
+        self.backoff_seconds = backoff_seconds
+        self.staging_dir = ensure_private_dir(
+            staging_dir or os.environ.get("UPLOAD_STAGING_DIR", DEFAULT_STAGING_DIR))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="upload")
+        self._lock = threading.Lock()
+        self._statuses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._done_events: Dict[str, threading.Event] = {}
+        self.recovered = self._recover()
+
+    def _set_status(self, bucket_name: str, s3_key: str, **fields) -> Dict[str, Any]:
+        with self._lock:
+            status = self._statuses.setdefault(s3_key, {"bucket": bucket_name, "key": s3_key, "attempts": 0,
+                                                        "error": None})
+            status.update(fields, updated_at=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+            self._statuses.move_to_end(s3_key)
+            while len(self._statuses) > MAX_TRACKED_UPLOADS:
+                old_key, old_status = next(iter(self._statuses.items()))
+                if old_status["state"] not in (DURABLE, FAILED):
+                    break
+                self._statuses.popitem(last=False)
+                self._done_events.pop(old_key, None)
+            return dict(status)
+
+    def _write_atomic(self, path: str, write) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.staging_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _stage(self, bucket_name: str, s3_key: str, data: Union[bytes, str]) -> Tuple[str, str]:
+        """Write the artifact, then its sidecar; only a complete pair is picked up by _recover."""
+        upload_id = uuid.uuid4().hex
+        staged_path = os.path.join(self.staging_dir, f"{upload_id}.data")
+        sidecar_path = os.path.join(self.staging_dir, f"{upload_id}.json")
+
+        def write_data(f):
+            if isinstance(data, bytes):
+                f.write(data)
+            else:
+                with open(data, "rb") as src:
+                    while chunk := src.read(1024 * 1024):
+                        f.write(chunk)
+
+        self._write_atomic(staged_path, write_data)
+        sidecar = {"bucket": bucket_name, "key": s3_key,
+                   "staged_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+        self._write_atomic(sidecar_path, lambda f: f.write(json.dumps(sidecar).encode("utf-8")))
+        return staged_path, sidecar_path
+
+    def _enqueue(self, bucket_name: str, s3_key: str, staged_path: str, sidecar_path: str) -> Dict[str, Any]:
+        with self._lock:
+            self._done_events[s3_key] = threading.Event()
+        status = self._set_status(bucket_name, s3_key, state=PENDING, attempts=0, error=None)
+        self._executor.submit(self._upload, bucket_name, s3_key, staged_path, sidecar_path)
+        return status
+
+    def submit(self, bucket_name: str, s3_key: str, data: Union[bytes, str]) -> Dict[str, Any]:
+        """Stage bytes (or a copy of a file) locally and queue the upload. Returns the initial status."""
+        staged_path, sidecar_path = self._stage(bucket_name, s3_key, data)
+        return self._enqueue(bucket_name, s3_key, staged_path, sidecar_path)
+
+    def _recover(self) -> int:
+        """Queue uploads staged by a previous process; drop leftovers that never got a sidecar."""
+        # Artifacts (or temp files) without a sidecar were never acknowledged to a client
+        for path in glob.glob(os.path.join(self.staging_dir, "*.part")) + \
+                glob.glob(os.path.join(self.staging_dir, "*.data")):
+            if path.endswith(".part") or not os.path.exists(path[:-len(".data")] + ".json"):
+                os.remove(path)
+
+        recovered = 0
+        for sidecar_path in sorted(glob.glob(os.path.join(self.staging_dir, "*.json"))):
+            staged_path = sidecar_path[:-len(".json")] + ".data"
+            try:
+                with open(sidecar_path, encoding="utf-8") as f:
+                    sidecar = json.load(f)
+                bucket_name, s3_key = sidecar["bucket"], sidecar["key"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable upload sidecar {sidecar_path}: {e}")
+                continue
+            if not os.path.exists(staged_path):
+                os.remove(sidecar_path)
+                continue
+            self._enqueue(bucket_name, s3_key, staged_path, sidecar_path)
+            recovered += 1
+        if recovered:
+            logger.info(f"Re-queued {recovered} staged uploads from {self.staging_dir}")
+        return recovered
+
+    def _upload(self, bucket_name: str, s3_key: str, staged_path: str, sidecar_path: str) -> None:
+        try:
+            for attempt in range(1, self.max_retries + 2):
+                self._set_status(bucket_name, s3_key, state=UPLOADING, attempts=attempt)
+                try:
+                    self.backend.upload(bucket_name, s3_key, staged_path)
+                    self._set_status(bucket_name, s3_key, state=DURABLE, error=None)
+                    return
+                except Exception as e:
+                    logger.warning(f"Upload of {s3_key} failed (attempt {attempt}): {e}")
+                    if attempt > self.max_retries:
+                        self._set_status(bucket_name, s3_key, state=FAILED, error=str(e))
+                        return
+                    self._set_status(bucket_name, s3_key, state=PENDING, error=str(e))
+                    time.sleep(self.backoff_seconds * (2 ** (attempt - 1)))
+        finally:
+            # Sidecar first: a crash in between leaves an orphan that _recover deletes, not a re-upload
+            for path in (sidecar_path, staged_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            with self._lock:
+                event = self._done_events.get(s3_key)
+            if event:
+                event.set()
+
+    def status(self, s3_key: str) -> Optional[Dict[str, Any]]:
+        """Current status of an upload, or None if the key is unknown."""
+        with self._lock:
+            status = self._statuses.get(s3_key)
+            return dict(status) if status else None
+
+    def wait(self, s3_key: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until an upload is durable or has failed, then return its status."""
+        with self._lock:
+            event = self._done_events.get(s3_key)
+        if event:
+            event.wait(timeout)
+        return self.status(s3_key)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of tracked uploads in each state."""
+        counts = {PENDING: 0, UPLOADING: 0, DURABLE: 0, FAILED: 0}
+        with self._lock:
+            for status in self._statuses.values():
+                counts[status["state"]] += 1
+        return counts
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work; by default wait for queued uploads to finish."""
+        self._executor.shutdown(wait=wait)
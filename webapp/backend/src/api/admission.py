@@ -0,0 +1,342 @@
+import asyncio
+import math
+import os
+import time
+import zipfile
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, Optional
+
+import fitz  # PyMuPDF
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from extraction.image_fetcher import default_max_total_bytes
+from extraction.pdf_backends import PYMUPDF_LOCK
+
+# Cost units: one unit per PDF page plus one per MB uploaded; URL-based work costs 1,
+# plus one per MB of its image budget when it downloads images.
+BYTES_PER_COST_UNIT = 1024 * 1024
+TRUE_FORM_VALUES = {"1", "true", "t", "yes", "y", "on"}
+# Page counts read the upload into memory and share PyMuPDF with running parses. Larger uploads,
+# or any upload when PyMuPDF stays busy, get a page count guessed from their size instead.
+PAGE_COUNT_MAX_BYTES = int(os.environ.get("ADMISSION_PAGE_COUNT_MAX_BYTES", 16 * 1024 * 1024))
+PAGE_COUNT_LOCK_TIMEOUT = 0.5
+BYTES_PER_PAGE_GUESS = 64 * 1024
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status and a Retry-After hint."""
+
+    def __init__(self, status_code: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Per-endpoint concurrency limit with a bounded FIFO wait queue.
+
+    A request is admitted when fewer than max_concurrent requests are running
+    and their summed cost stays within max_cost (a lone request is always
+    admitted, however large). Otherwise it waits in the queue for at most
+    queue_timeout seconds. When the queue already holds max_queue requests
+    or max_queue_cost units, the request is rejected right away with 429. A
+    request that times out in the queue gets 503. Both carry a Retry-After
+    estimate based on recent service times.
+    """
+
+    def __init__(self, name: str, max_concurrent: int = 2, max_queue: int = 8, max_cost: float = 500.0,
+                 max_queue_cost: float = 2000.0, queue_timeout: float = 30.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_cost = max_cost
+        self.max_queue_cost = max_queue_cost
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._in_flight_cost = 0.0
+        self._queued_cost = 0.0
+        self._waiters: deque = deque()
+        self._avg_service_seconds = 1.0
+        self.admitted_total = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @classmethod
+    def from_env(cls, name: str, **defaults) -> "AdmissionController":
+        """
+        Build a controller whose limits can be overridden per endpoint, e.g.
+        ADMISSION_UPLOAD_PDF_OPENSOURCE_CONCURRENCY, _QUEUE, _MAX_COST, _MAX_QUEUE_COST, _QUEUE_TIMEOUT.
+        """
+        prefix = f"ADMISSION_{name.upper()}_"
+        env_names = {
+            "max_concurrent": ("CONCURRENCY", int),
+            "max_queue": ("QUEUE", int),
+            "max_cost": ("MAX_COST", float),
+            "max_queue_cost": ("MAX_QUEUE_COST", float),
+            "queue_timeout": ("QUEUE_TIMEOUT", float),
+        }
+        for field, (suffix, cast) in env_names.items():
+            value = os.environ.get(prefix + suffix)
+            if value is not None:
+                defaults[field] = cast(value)
+        return cls(name, **defaults)
+
+    def _fits(self, cost: float) -> bool:
+        if self._in_flight >= self.max_concurrent:
+            return False
+        return self._in_flight == 0 or self._in_flight_cost + cost <= self.max_cost
+
+    def _admit(self, cost: float) -> None:
+        self._in_flight += 1
+        self._in_flight_cost += cost
+        self.admitted_total += 1
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._fits(self._waiters[0][0]):
+            cost, future = self._waiters.popleft()
+            self._queued_cost -= cost
+            if future.done():
+                continue
+            self._admit(cost)
+            future.set_result(True)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a request joining the queue now."""
+        waves = (len(self._waiters) + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(self._avg_service_seconds * waves))
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        if not self._waiters and self._fits(cost):
+            self._admit(cost)
+            return
+
+        if len(self._waiters) >= self.max_queue or self._queued_cost + cost > self.max_queue_cost:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(429, f"Too many pending {self.name} requests; please retry later.",
+                                    self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (cost, future)
+        self._waiters.append(entry)
+        self._queued_cost += cost
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away while queued (or right after being admitted)
+            if future.done():
+                self.release(cost, 0.0)
+            else:
+                self._remove_waiter(entry)
+            raise
+
+        if not future.done():
+            self._remove_waiter(entry)
+            self.rejected_timeout += 1
+            raise AdmissionRejected(503, f"Timed out waiting for a free {self.name} slot; please retry later.",
+                                    self.retry_after())
+
+    def _remove_waiter(self, entry) -> None:
+        try:
+            self._waiters.remove(entry)
+            self._queued_cost -= entry[0]
+        except ValueError:
+            pass
+        entry[1].cancel()
+        # A large request at the head may have been blocking smaller ones behind it
+        self._wake_waiters()
+
+    def release(self, cost: float, service_seconds: float) -> None:
+        self._in_flight -= 1
+        self._in_flight_cost -= cost
+        if service_seconds > 0:
+            self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * service_seconds
+        self._wake_waiters()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "in_flight_cost": round(self._in_flight_cost, 1),
+            "queue_depth": len(self._waiters),
+            "queued_cost": round(self._queued_cost, 1),
+            "admitted_total": self.admitted_total,
+            "rejected_queue_full_total": self.rejected_queue_full,
+            "rejected_timeout_total": self.rejected_timeout,
+            "avg_service_seconds": round(self._avg_service_seconds, 3),
+            "limits": {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "max_cost": self.max_cost,
+                "max_queue_cost": self.max_queue_cost,
+                "queue_timeout": self.queue_timeout,
+            },
+        }
+
+
+def _count_pages(file: BinaryIO, size: int) -> float:
+    """Page count read from the xref (no parsing); only one upload is read for this at a time."""
+    if size > PAGE_COUNT_MAX_BYTES or not PYMUPDF_LOCK.acquire(timeout=PAGE_COUNT_LOCK_TIMEOUT):
+        return size / BYTES_PER_PAGE_GUESS
+    try:
+        with fitz.open(stream=file.read(), filetype="pdf") as doc:
+            return len(doc)
+    except Exception:
+        return 1
+    finally:
+        file.seek(0)
+        PYMUPDF_LOCK.release()
+
+
+def estimate_pdf_cost(file: BinaryIO) -> float:
+    """Cost of a PDF upload: its page count plus its size in MB, taken from the spooled upload."""
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    return max(1.0, _count_pages(file, size) + size / BYTES_PER_COST_UNIT)
+
+
+def estimate_zip_cost(file: BinaryIO) -> float:
+    """
+    Cost of a ZIP of PDFs, read from its central directory only: one unit per PDF
+    member plus its uncompressed size in MB (page counts would need extracting).
+    """
+    try:
+        with zipfile.ZipFile(file) as archive:
+            members = [m for m in archive.infolist() if not m.is_dir() and m.filename.lower().endswith(".pdf")]
+    except zipfile.BadZipFile:
+        members = []
+    finally:
+        file.seek(0)
+    return max(1.0, sum(1 + m.file_size / BYTES_PER_COST_UNIT for m in members))
+
+
+def _read_batch_cost(uploads) -> float:
+    cost = 0.0
+    for upload in uploads:
+        if (upload.filename or "").lower().endswith(".zip"):
+            cost += estimate_zip_cost(upload.file)
+        else:
+            cost += estimate_pdf_cost(upload.file)
+    return max(1.0, cost)
+
+
+async def pdf_upload_cost(request: Request) -> float:
+    """Estimate the cost of a multipart request carrying a PDF in its "file" field."""
+    form = await request.form()
+    upload = form.get("file")
+    if upload is None or not hasattr(upload, "file"):
+        return 1.0
+    # Reading the upload and opening it with PyMuPDF blocks, so keep it off the event loop
+    return await run_in_threadpool(estimate_pdf_cost, upload.file)
+
+
+async def pdf_batch_cost(request: Request) -> float:
+    """Estimate the cost of a batch upload: the summed cost of every PDF and ZIP in its "files" fields."""
+    form = await request.form()
+    uploads = [upload for upload in form.getlist("files") if hasattr(upload, "file")]
+    return await run_in_threadpool(_read_batch_cost, uploads)
+
+
+async def scrape_cost(request: Request) -> float:
+    """Estimate the cost of a page scrape: 1, plus the image byte budget in MB with download_images."""
+    form = await request.form()
+    download_images = str(form.get("download_images", "")).strip().lower() in TRUE_FORM_VALUES
+    return 1.0 + (default_max_total_bytes() / BYTES_PER_COST_UNIT if download_images else 0.0)
+
+
+async def url_batch_cost(request: Request) -> float:
+    """Estimate the cost of a URL batch: one unit per distinct URL in its "urls" fields."""
+    form = await request.form()
+    return max(1.0, len({url.strip() for url in form.getlist("urls") if isinstance(url, str) and url.strip()}))
+
+
+def http_exception(rejection: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=rejection.status_code, detail=str(rejection),
+                         headers={"Retry-After": str(rejection.retry_after)})
+
+
+def admission_dependency(controller: AdmissionController,
+                         estimate_cost: Optional[Callable[[Request], Awaitable[float]]] = None):
+    """
+    FastAPI dependency that holds an admission slot for the duration of a request,
+    or fails fast with 429/503 and a Retry-After header.
+    """
+    async def dependency(request: Request):
+        cost = await estimate_cost(request) if estimate_cost else 1.0
+        try:
+            await controller.acquire(cost)
+        except AdmissionRejected as e:
+            raise http_exception(e)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            controller.release(cost, time.monotonic() - started)
+
+    return dependency
+
+
+class JobSlots:
+    """
+    Limit on how many background jobs of one kind run at once.
+
+    Admission only covers the request that submits a job; the job itself runs
+    after the response. Jobs beyond max_running wait (staying "queued") for a
+    slot. Once max_waiting jobs are waiting, reserve() rejects new submissions
+    with 429 and a Retry-After estimate based on recent job durations.
+    """
+
+    def __init__(self, name: str, max_running: int = 1, max_waiting: int = 8):
+        self.name = name
+        self.max_running = max_running
+        self.max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(max_running)
+        self._running = 0
+        self._waiting = 0
+        self._avg_job_seconds = 60.0
+        self.rejected_total = 0
+
+    @classmethod
+    def from_env(cls, name: str, **defaults) -> "JobSlots":
+        """Limits can be overridden with BATCH_JOBS_<NAME>_RUNNING and BATCH_JOBS_<NAME>_WAITING."""
+        prefix = f"BATCH_JOBS_{name.upper()}_"
+        for field, suffix in (("max_running", "RUNNING"), ("max_waiting", "WAITING")):
+            value = os.environ.get(prefix + suffix)
+            if value is not None:
+                defaults[field] = int(value)
+        return cls(name, **defaults)
+
+    def reserve(self) -> None:
+        """Claim a place for a job about to be scheduled; the job must then enter slot()."""
+        if self._waiting >= self.max_waiting:
+            self.rejected_total += 1
+            waves = (self._waiting + 1) / max(1, self.max_running)
+            raise AdmissionRejected(429, f"Too many pending {self.name} jobs; please retry later.",
+                                    max(1, math.ceil(self._avg_job_seconds * waves)))
+        self._waiting += 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for a free slot for a reserved job and hold it while the job runs."""
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._running += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * (time.monotonic() - started)
+            self._semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "waiting": self._waiting,
+            "rejected_total": self.rejected_total,
+            "avg_job_seconds": round(self._avg_job_seconds, 3),
+            "limits": {"max_running": self.max_running, "max_waiting": self.max_waiting},
+        }
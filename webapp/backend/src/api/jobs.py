@@ -0,0 +1,70 @@
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+MAX_TRACKED_JOBS = 1000
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class JobStore:
+    """In-memory registry of long-running jobs, polled by clients through GET /jobs/{job_id}."""
+
+    def __init__(self, max_jobs: int = MAX_TRACKED_JOBS):
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def create(self, kind: str, total: int) -> Dict[str, Any]:
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "state": QUEUED,
+            "total": total,
+            "completed": 0,
+            "failed": 0,
+            "documents": [],
+            "download_url": None,
+            "s3_key": None,
+            "upload_status": None,
+            "error": None,
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+            return dict(job)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=_now())
+
+    def add_document(self, job_id: str, document: Dict[str, Any]) -> None:
+        """Record the outcome of one item and advance the progress counters."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["documents"].append(document)
+            job["completed" if document["status"] == "success" else "failed"] += 1
+            job["updated_at"] = _now()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "documents": list(job["documents"])}
@@ -1,9 +1,10 @@
+import asyncio
 import os
 import sys
 import tempfile
-import zipfile
-import io
 import shutil
+import time
+import logging
 import pandas as pd
 
 from datetime import datetime
@@ -12,16 +13,28 @@ import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import FastAPI and necessary modules
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 
 # Import custom modules for S3 operations and data extraction
-from S3.s3_organization import upload_to_s3, generate_s3_key, generate_presigned_url
+from S3.s3_organization import generate_s3_key
+from S3.storage_backends import get_storage_backend
+from S3.upload_queue import UploadQueue
+from S3.manifest_index import ManifestIndex, sha256_of
+from archive.archive_builder import ArchiveBuilder
+from api.jobs import JobStore, RUNNING, COMPLETED, FAILED
+from api.admission import (AdmissionController, AdmissionRejected, JobSlots, admission_dependency, http_exception,
+                           pdf_batch_cost, pdf_upload_cost, scrape_cost, url_batch_cost)
 from extraction.pdf_parser_enterprise import extract_and_store_pdf
 from extraction.pdf_parser_opensource import process_pdf_with_open_source
+from extraction.batch_processor import expand_inputs, run_batch
+from extraction.pdf_backends import validate_backend
 from extraction.web_scraper import scrape_url_and_convert
+from extraction.web_crawler import crawl, crawl_limits
+from extraction.image_fetcher import fetch_images
 from extraction.web_scraper_enterprise import scrape_url_with_diffbot
 
 
@@ -29,7 +42,69 @@ from extraction.web_scraper_enterprise import scrape_url_with_diffbot
 app = FastAPI()
 print(os.path.abspath(__file__))
 
-@app.post("/upload_pdf_enterprise")
+# Result archives are uploaded in the background; responses carry a presigned URL immediately
+storage = get_storage_backend()
+upload_queue = UploadQueue(storage)
+
+# Background batch jobs, polled through GET /jobs/{job_id}
+jobs = JobStore()
+
+# Per-endpoint concurrency limits and bounded wait queues. PDF costs are pages + MB, a scrape
+# with download_images costs 1 + its image byte budget in MB;
+# every limit can be overridden with ADMISSION_<ENDPOINT>_* environment variables.
+admission = {
+    "upload_pdf_enterprise": AdmissionController.from_env("upload_pdf_enterprise", max_concurrent=4, max_queue=16),
+    "upload_pdf_opensource": AdmissionController.from_env("upload_pdf_opensource", max_concurrent=2, max_queue=8,
+                                                          max_cost=300, max_queue_cost=1500),
+    "upload_pdf_opensource_batch": AdmissionController.from_env("upload_pdf_opensource_batch", max_concurrent=2,
+                                                                max_queue=4, max_cost=1000, max_queue_cost=4000),
+    "scrape_webpage": AdmissionController.from_env("scrape_webpage", max_concurrent=4, max_queue=16,
+                                                   max_cost=150, max_queue_cost=600),
+    "scrape_webpage_batch": AdmissionController.from_env("scrape_webpage_batch", max_concurrent=2, max_queue=8,
+                                                         max_cost=500, max_queue_cost=2000),
+    "crawl_webpage": AdmissionController.from_env("crawl_webpage", max_concurrent=1, max_queue=2),
+    "scrape_diffbot": AdmissionController.from_env("scrape_diffbot", max_concurrent=8, max_queue=32),
+}
+
+# Batch jobs run after their request has returned, so admission alone does not bound them.
+# Each PDF batch starts a BATCH_WORKERS-sized process pool; further jobs wait as "queued".
+batch_jobs = {
+    "pdf_opensource_batch": JobSlots.from_env("pdf_opensource_batch", max_running=1, max_waiting=8),
+    "scrape_batch": JobSlots.from_env("scrape_batch", max_running=2, max_waiting=16),
+}
+
+# Local index of processed documents (snapshotted to the storage backend when MANIFEST_BUCKET is set)
+manifest = ManifestIndex(storage=storage)
+
+def _record_document(file_name: str, input_sha256: str, bucket_name: str, s3_key: str, parser: str,
+                     started: float, input_size: Optional[int] = None, output_size: Optional[int] = None,
+                     duration_ms: Optional[float] = None) -> None:
+    """Add a processed document to the manifest; indexing problems never fail the request."""
+    if duration_ms is None:
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    try:
+        manifest.record(
+            file_name=file_name,
+            input_sha256=input_sha256,
+            bucket=bucket_name,
+            s3_key=s3_key,
+            parser=parser,
+            input_size=input_size,
+            output_size=output_size,
+            duration_ms=duration_ms,
+        )
+    except Exception as e:
+        logging.warning(f"Failed to record {file_name} in manifest: {e}")
+
+@app.on_event("shutdown")
+def close_manifest() -> None:
+    upload_queue.shutdown(wait=True)
+    manifest.close()
+
+@app.post(
+    "/upload_pdf_enterprise",
+    dependencies=[Depends(admission_dependency(admission["upload_pdf_enterprise"], pdf_upload_cost))]
+)
 async def process_pdf(
     file: UploadFile = File(...),
     bucket_name: str = Form(default="bigdata-project1-storage")
@@ -43,6 +118,7 @@ async def process_pdf(
     4. Remove the temporary file.
     5. Return the download link for the processed data.
     """
+    started = time.perf_counter()
     try:
         # Save uploaded PDF to a temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
@@ -52,14 +128,18 @@ async def process_pdf(
 
         # Generate S3 key and upload the original PDF
         s3_key = generate_s3_key(file_type="pdf", file_name=file.filename)
-        upload_to_s3(bucket_name, s3_key, tmp_path)
+        # The enterprise parser reads the PDF back from S3, so this upload must complete first
+        await run_in_threadpool(storage.upload, bucket_name, s3_key, tmp_path)
 
         # Process the PDF and store results in S3
-        result = extract_and_store_pdf(pdf_path=s3_key, bucket_name=bucket_name)
+        result = await run_in_threadpool(extract_and_store_pdf, pdf_path=s3_key, bucket_name=bucket_name)
 
         # Remove the temporary file
         os.remove(tmp_path)
 
+        await run_in_threadpool(_record_document, file.filename, sha256_of(content), bucket_name, s3_key,
+                                "enterprise", started, input_size=len(content))
+
         return {
             "status": "success",
             "download_url": result["download_url"],
@@ -69,14 +149,22 @@ async def process_pdf(
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@app.post("/upload_pdf_opensource")
+@app.post(
+    "/upload_pdf_opensource",
+    dependencies=[Depends(admission_dependency(admission["upload_pdf_opensource"], pdf_upload_cost))]
+)
 async def upload_pdf_opensource(
     file: UploadFile = File(...),
+    text_backend: str = Form(default="auto"),
+    table_backend: str = Form(default="auto"),
     bucket_name: str = Form(default="bigdata-project1-storage")
 ) -> Dict[str, Any]:
     """
     Endpoint to process a PDF using an open-source parser.
+    text_backend / table_backend select "pymupdf", "pdfplumber" or "auto"
+    (PyMuPDF, falling back to pdfplumber only when needed).
     """
+    started = time.perf_counter()
     pdf_path = None
     parsed = None
     try:
@@ -87,30 +175,17 @@ async def upload_pdf_opensource(
             pdf_path = tmp_pdf.name
 
         # Process the PDF to extract content
-        parsed = process_pdf_with_open_source(pdf_path)
-
-        # Create an in-memory ZIP archive
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-            # Add extracted markdown files
-            zf.writestr("docling.md", parsed["docling_markdown"])
-            zf.writestr("markitdown.md", parsed["markitdown_markdown"])
-
-            # Add extracted images
-            if os.path.exists(parsed["images_dir"]):
-                for root, _, files in os.walk(parsed["images_dir"]):
-                    for file_name in files:
-                        file_path = os.path.join(root, file_name)
-                        zip_path = os.path.join("images", file_name)
-                        zf.write(file_path, zip_path)
-
-            # Add extracted tables
-            if os.path.exists(parsed["tables_dir"]):
-                for root, _, files in os.walk(parsed["tables_dir"]):
-                    for file_name in files:
-                        file_path = os.path.join(root, file_name)
-                        zip_path = os.path.join("tables", file_name)
-                        zf.write(file_path, zip_path)
+        parsed = await run_in_threadpool(
+            process_pdf_with_open_source, pdf_path, text_backend=text_backend, table_backend=table_backend
+        )
+
+        # Build the ZIP archive; images are stored as-is, text entries are compressed in parallel
+        builder = ArchiveBuilder()
+        builder.add("docling.md", parsed["docling_markdown"])
+        builder.add("markitdown.md", parsed["markitdown_markdown"])
+        builder.add_directory("images", parsed["images_dir"])
+        builder.add_directory("tables", parsed["tables_dir"])
+        zip_bytes = await run_in_threadpool(builder.build)
 
         # Remove temporary files and directories
         os.remove(pdf_path)
@@ -119,14 +194,21 @@ async def upload_pdf_opensource(
 
         # Upload the ZIP archive to S3
         zip_key = generate_s3_key("pdf/opensource", file.filename) + "_result.zip"
-        zip_buffer.seek(0)
-        upload_to_s3(bucket_name, zip_key, zip_buffer.getvalue())
+        upload = await run_in_threadpool(upload_queue.submit, bucket_name, zip_key, zip_bytes)
+
+        await run_in_threadpool(_record_document, file.filename, sha256_of(content), bucket_name, zip_key,
+                                "opensource", started, input_size=len(content), output_size=len(zip_bytes))
 
         # Generate a presigned URL for downloading the ZIP archive
-        download_url = generate_presigned_url(bucket_name, zip_key)
+        download_url = storage.presigned_url(bucket_name, zip_key)
         return {
             "status": "success",
             "download_url": download_url,
+            "s3_key": zip_key,
+            "upload_status": upload["state"],
+            "timings": parsed.get("timings"),
+            "backends": parsed.get("backends"),
+            "page_summary": parsed.get("page_summary"),
             "message": "ZIP contains two Markdown files, extracted images, and tables."
         }
 
@@ -144,9 +226,188 @@ async def upload_pdf_opensource(
         # Return JSON error response
         return {"status": "error", "message": str(e)}
 
-@app.post("/scrape_webpage")
+async def _run_when_free(slots: JobSlots, job, *args) -> None:
+    """Wait for a free batch job slot, then run the job (a coroutine or a blocking function)."""
+    async with slots.slot():
+        if asyncio.iscoroutinefunction(job):
+            await job(*args)
+        else:
+            await run_in_threadpool(job, *args)
+
+# References to running job tasks, so they are not garbage collected before finishing
+_job_tasks = set()
+
+def _start_job(slots: JobSlots, job, *args) -> None:
+    """
+    Run a batch job detached from the request. FastAPI background tasks run before
+    the request's dependencies exit, so they would hold the admission slot for the
+    whole job; the admission slot only covers receiving the upload.
+    """
+    task = asyncio.get_running_loop().create_task(_run_when_free(slots, job, *args))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+
+def _save_batch_uploads(files: List[UploadFile], work_dir: str) -> List[tuple]:
+    """Copy the uploaded files into work_dir and expand ZIPs into a flat list of (name, path) PDFs."""
+    uploads = []
+    for i, upload in enumerate(files):
+        file_name = os.path.basename(upload.filename or f"file_{i}.pdf")
+        path = os.path.join(work_dir, f"upload_{i:05d}_{file_name}")
+        with open(path, "wb") as f:
+            shutil.copyfileobj(upload.file, f)
+        uploads.append((file_name, path))
+    return expand_inputs(uploads, work_dir)
+
+def _run_pdf_batch(job_id: str, documents: List[tuple], work_dir: str, bucket_name: str,
+                   text_backend: str = "auto", table_backend: str = "auto") -> None:
+    """Background task: parse every PDF of a batch job and upload one consolidated archive."""
+    started = time.perf_counter()
+    jobs.update(job_id, state=RUNNING)
+    temp_dirs = []
+    try:
+        builder = ArchiveBuilder()
+        statuses, temp_dirs = run_batch(
+            documents, builder, text_backend=text_backend, table_backend=table_backend,
+            on_document=lambda status: jobs.add_document(job_id, status)
+        )
+        builder.add("manifest.json", json.dumps({"job_id": job_id, "documents": statuses}, indent=2))
+
+        # Stream the archive into work_dir rather than memory; the upload queue stages its own copy
+        zip_key = generate_s3_key("pdf/opensource/batch", "result.zip")
+        zip_path = os.path.join(work_dir, "result.zip")
+        with open(zip_path, "wb") as f:
+            builder.write_to(f)
+        upload = upload_queue.submit(bucket_name, zip_key, zip_path)
+
+        for (name, path), status in zip(documents, statuses):
+            if status["status"] == "success":
+                with open(path, "rb") as f:
+                    content = f.read()
+                _record_document(name, sha256_of(content), bucket_name, zip_key, "opensource_batch",
+                                 started, input_size=len(content), duration_ms=status["duration_ms"])
+
+        jobs.update(
+            job_id,
+            state=COMPLETED,
+            s3_key=zip_key,
+            download_url=storage.presigned_url(bucket_name, zip_key),
+            upload_status=upload["state"],
+        )
+    except Exception as e:
+        jobs.update(job_id, state=FAILED, error=str(e))
+    finally:
+        for directory in temp_dirs:
+            shutil.rmtree(directory, ignore_errors=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+@app.post(
+    "/upload_pdf_opensource_batch",
+    dependencies=[Depends(admission_dependency(admission["upload_pdf_opensource_batch"], pdf_batch_cost))]
+)
+async def upload_pdf_opensource_batch(
+    files: List[UploadFile] = File(...),
+    text_backend: str = Form(default="auto"),
+    table_backend: str = Form(default="auto"),
+    bucket_name: str = Form(default="bigdata-project1-storage")
+) -> Dict[str, Any]:
+    """
+    Batch endpoint for the open-source parser.
+    1. Accepts many PDFs and/or ZIP archives of PDFs in one request.
+    2. Starts a background job that parses the documents on a process pool. The job stays
+       "queued" while other PDF batches hold every job slot (429 once too many are waiting).
+    3. Returns a job id immediately; poll GET /jobs/{job_id} for progress.
+    The finished job links to one ZIP with documents/<index>_<name>/ folders and a
+    manifest.json holding the status of every document. A bad file only fails its own entry.
+    ZIP uploads may hold at most BATCH_ZIP_MAX_MEMBERS PDFs and BATCH_ZIP_MAX_BYTES unpacked in total.
+    """
+    try:
+        text_backend = validate_backend(text_backend)
+        table_backend = validate_backend(table_backend)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    work_dir = tempfile.mkdtemp(prefix="batch_")
+    try:
+        documents = await run_in_threadpool(_save_batch_uploads, files, work_dir)
+        if not documents:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            return {"status": "error", "message": "No PDF files found in the upload."}
+
+        slots = batch_jobs["pdf_opensource_batch"]
+        try:
+            slots.reserve()
+        except AdmissionRejected as e:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise http_exception(e)
+        job = jobs.create("pdf_opensource_batch", total=len(documents))
+        _start_job(slots, _run_pdf_batch, job["job_id"], documents, work_dir, bucket_name,
+                   text_backend, table_backend)
+        return {
+            "status": "success",
+            "job_id": job["job_id"],
+            "status_url": f"/jobs/{job['job_id']}",
+            "total_documents": len(documents),
+            "message": "Batch accepted. Poll the status URL for progress and the download link."
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return {"status": "error", "message": str(e)}
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> Dict[str, Any]:
+    """
+    Progress of a background job: state ("queued", "running", "completed", "failed"),
+    per-document results so far and, once completed, the download link and upload status.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job["s3_key"]:
+        upload = upload_queue.status(job["s3_key"])
+        job["upload_status"] = upload["state"] if upload else job["upload_status"]
+    return {"status": "success", **job}
+
+def _add_scrape_result(builder: ArchiveBuilder, result: Dict[str, Any], prefix: str = "") -> None:
+    """Add the Markdown, raw text, tables, image and link metadata of one scraped page to an archive."""
+    docling_md = result.get("docling_markdown", "")
+    markitdown_md = result.get("markitdown_markdown", "")
+    text_raw = result.get("text_raw", "")
+    images_data = result.get("images", [])
+    tables_data = result.get("tables", [])
+    urls_data = result.get("urls", [])
+
+    builder.add(f"{prefix}docling.md", docling_md)
+    builder.add(f"{prefix}markitdown.md", markitdown_md)
+    builder.add(f"{prefix}content.txt", text_raw)
+
+    if tables_data:
+        for i, df in enumerate(tables_data, start=1):
+            builder.add(f"{prefix}tables/table_{i}.csv", df.to_csv(index=False))
+    else:
+        builder.add(f"{prefix}tables/.placeholder", "")
+
+    if images_data:
+        builder.add(f"{prefix}images/images_metadata.csv", pd.DataFrame(images_data).to_csv(index=False))
+    else:
+        builder.add(f"{prefix}images/.placeholder", "")
+
+    if urls_data:
+        builder.add(f"{prefix}urls/urls_metadata.csv", pd.DataFrame(urls_data).to_csv(index=False))
+    else:
+        builder.add(f"{prefix}urls/.placeholder", "")
+
+@app.post(
+    "/scrape_webpage",
+    dependencies=[Depends(admission_dependency(admission["scrape_webpage"], scrape_cost))]
+)
 async def scrape_webpage(
     url: str = Form(...),
+    download_images: bool = Form(default=False),
+    streaming: bool = Form(default=False),
+    max_bytes: Optional[int] = Form(default=None),
     bucket_name: str = Form(default="bigdata-project1-storage")
 ) -> Dict[str, Any]:
     """
@@ -154,66 +415,46 @@ async def scrape_webpage(
     1. Scrapes the webpage and extracts text, images, tables, and links.
     2. Converts extracted content to Markdown and other formats.
     3. Packages data into a ZIP file and uploads it to S3.
+       With download_images, the referenced images are fetched concurrently into images/
+       (at most IMAGE_FETCH_MAX_IMAGES images and IMAGE_FETCH_MAX_TOTAL_BYTES in total).
+       With streaming, the page is parsed as it downloads (at most max_bytes) without building a DOM tree.
     4. Returns a downloadable S3 link.
     """
+    if max_bytes is not None and max_bytes <= 0:
+        return {"status": "error", "message": "max_bytes must be a positive number of bytes."}
+    started = time.perf_counter()
     try:
         # Step 1: Scrape the webpage
-        result = scrape_url_and_convert(url)
+        result = await run_in_threadpool(scrape_url_and_convert, url, streaming=streaming, max_bytes=max_bytes)
         if not result or result.get("error"):
             return {"status": "error", "message": result.get("error", "Unknown error occurred")}
 
-        # Step 2: Prepare data for ZIP file
-        docling_md = result.get("docling_markdown", "")
-        markitdown_md = result.get("markitdown_markdown", "")
-        text_raw = result.get("text_raw", "")
-        images_data = result.get("images", [])
-        tables_data = result.get("tables", [])
-        urls_data = result.get("urls", [])
-
-        # Step 3: Create ZIP file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr("docling.md", docling_md)
-            zf.writestr("markitdown.md", markitdown_md)
-            zf.writestr("content.txt", text_raw)
-
-            if tables_data:
-                for i, df in enumerate(tables_data, start=1):
-                    csv_buffer = io.StringIO()
-                    df.to_csv(csv_buffer, index=False)
-                    zf.writestr(f"tables/table_{i}.csv", csv_buffer.getvalue())
-            else:
-                zf.writestr("tables/.placeholder", "")
-
-            if images_data:
-                df_images = pd.DataFrame(images_data)
-                csv_buf = io.StringIO()
-                df_images.to_csv(csv_buf, index=False)
-                zf.writestr("images/images_metadata.csv", csv_buf.getvalue())
-            else:
-                zf.writestr("images/.placeholder", "")
-
-            if urls_data:
-                df_urls = pd.DataFrame(urls_data)
-                csv_buf = io.StringIO()
-                df_urls.to_csv(csv_buf, index=False)
-                zf.writestr("urls/urls_metadata.csv", csv_buf.getvalue())
-            else:
-                zf.writestr("urls/.placeholder", "")
+        # Step 2 & 3: Package extracted data into a ZIP file in memory
+        builder = ArchiveBuilder()
+        if download_images and result.get("images"):
+            result["images"] = await run_in_threadpool(fetch_images, result["images"], builder)
+        _add_scrape_result(builder, result)
 
         # Step 4: Upload ZIP to S3
         file_type = "web_scraper/opensource"
         file_name = "result.zip"
         zip_key = generate_s3_key(file_type=file_type, file_name=file_name)
-        zip_buffer.seek(0)
-        upload_to_s3(bucket_name, zip_key, zip_buffer.getvalue())
+        zip_bytes = await run_in_threadpool(builder.build)
+        upload = await run_in_threadpool(upload_queue.submit, bucket_name, zip_key, zip_bytes)
+        await run_in_threadpool(_record_document, url, sha256_of(url), bucket_name, zip_key, "web_scraper",
+                                started, output_size=len(zip_bytes))
 
         # Step 5: Generate presigned S3 URL
-        download_url = generate_presigned_url(bucket_name, zip_key)
+        download_url = storage.presigned_url(bucket_name, zip_key)
 
         return {
             "status": "success",
             "download_url": download_url,
+            "s3_key": zip_key,
+            "upload_status": upload["state"],
+            "timings": result.get("timings"),
+            "truncated": result.get("truncated", False),
+            "cache": result.get("cache"),
             "message": "The ZIP archive has been stored in S3 and is available for download."
         }
 
@@ -227,7 +468,165 @@ async def scrape_webpage(
 
 
 
-@app.post("/scrape_diffbot")
+async def _run_scrape_batch(job_id: str, urls: List[str], bucket_name: str, download_images: bool,
+                            concurrency: int = 4) -> None:
+    """Background task: scrape every URL of a batch job and upload one consolidated archive."""
+    started = time.perf_counter()
+    jobs.update(job_id, state=RUNNING)
+    try:
+        builder = ArchiveBuilder()
+        semaphore = asyncio.Semaphore(concurrency)
+        statuses: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        stored_images: Dict[str, str] = {}
+
+        async def scrape_one(index: int, url: str) -> None:
+            prefix = f"pages/{index + 1:04d}/"
+            status = {"index": index + 1, "url": url, "status": "success", "error": None,
+                      "cache": None, "output_prefix": None}
+            async with semaphore:
+                try:
+                    result = await asyncio.to_thread(scrape_url_and_convert, url)
+                    if not result or result.get("error"):
+                        raise ValueError(result.get("error", "Unknown error occurred"))
+                    # Images land in one shared images/ folder; stored_images is shared by every
+                    # page, so an image used on several pages is stored once
+                    if download_images and result.get("images"):
+                        result["images"] = await asyncio.to_thread(fetch_images, result["images"], builder,
+                                                                   stored=stored_images)
+                    _add_scrape_result(builder, result, prefix=prefix)
+                    status.update(cache=result.get("cache"), output_prefix=prefix)
+                except Exception as e:
+                    status.update(status="error", error=str(e))
+            statuses[index] = status
+            jobs.add_document(job_id, status)
+
+        await asyncio.gather(*(scrape_one(i, url) for i, url in enumerate(urls)))
+        builder.add("manifest.json", json.dumps({"job_id": job_id, "pages": statuses}, indent=2))
+
+        zip_key = generate_s3_key("web_scraper/batch", "result.zip")
+        zip_bytes = await asyncio.to_thread(builder.build)
+        upload = await asyncio.to_thread(upload_queue.submit, bucket_name, zip_key, zip_bytes)
+        for status in statuses:
+            if status["status"] == "success":
+                await run_in_threadpool(_record_document, status["url"], sha256_of(status["url"]),
+                                        bucket_name, zip_key, "web_scraper_batch", started)
+
+        jobs.update(
+            job_id,
+            state=COMPLETED,
+            s3_key=zip_key,
+            download_url=storage.presigned_url(bucket_name, zip_key),
+            upload_status=upload["state"],
+        )
+    except Exception as e:
+        jobs.update(job_id, state=FAILED, error=str(e))
+
+@app.post(
+    "/scrape_webpage_batch",
+    dependencies=[Depends(admission_dependency(admission["scrape_webpage_batch"], url_batch_cost))]
+)
+async def scrape_webpage_batch(
+    urls: List[str] = Form(...),
+    download_images: bool = Form(default=False),
+    bucket_name: str = Form(default="bigdata-project1-storage")
+) -> Dict[str, Any]:
+    """
+    Batch endpoint for the web scraper.
+    1. Accepts many URLs in one request (repeat the "urls" form field).
+    2. Starts a background job that scrapes them concurrently. The job stays "queued" while
+       other scrape batches hold every job slot (429 once too many are waiting).
+    3. Returns a job id immediately; poll GET /jobs/{job_id} for progress.
+    The finished job links to one ZIP with pages/<index>/ folders and a manifest.json
+    holding the status of every URL. A failing URL only fails its own entry.
+    """
+    # Drop blanks and duplicates, keeping the submitted order
+    urls = list(dict.fromkeys(u.strip() for u in urls if u.strip()))
+    if not urls:
+        return {"status": "error", "message": "No URLs provided."}
+
+    slots = batch_jobs["scrape_batch"]
+    try:
+        slots.reserve()
+    except AdmissionRejected as e:
+        raise http_exception(e)
+    job = jobs.create("scrape_batch", total=len(urls))
+    _start_job(slots, _run_scrape_batch, job["job_id"], urls, bucket_name, download_images)
+    return {
+        "status": "success",
+        "job_id": job["job_id"],
+        "status_url": f"/jobs/{job['job_id']}",
+        "total_urls": len(urls),
+        "message": "Batch accepted. Poll the status URL for progress and the download link."
+    }
+
+@app.post(
+    "/crawl_webpage",
+    dependencies=[Depends(admission_dependency(admission["crawl_webpage"]))]
+)
+async def crawl_webpage(
+    url: str = Form(...),
+    max_depth: int = Form(default=1),
+    max_pages: int = Form(default=20),
+    same_domain: bool = Form(default=True),
+    concurrency: int = Form(default=4),
+    bucket_name: str = Form(default="bigdata-project1-storage")
+) -> Dict[str, Any]:
+    """
+    Crawl a site starting from a seed URL:
+    1. Follows links found on each page up to max_depth / max_pages, optionally staying on the seed's domain.
+       max_depth, max_pages and concurrency are capped by CRAWL_MAX_DEPTH / _PAGES / _CONCURRENCY.
+    2. Runs every page through the same extraction and conversion as /scrape_webpage.
+    3. Packages each page under pages/<index>/ as soon as it is scraped, plus a crawl_manifest.csv.
+    4. Uploads the ZIP file to S3 and returns a downloadable link.
+    """
+    started = time.perf_counter()
+    try:
+        builder = ArchiveBuilder()
+
+        def package_page(index: int, page_url: str, depth: int, result: Dict[str, Any]) -> None:
+            _add_scrape_result(builder, result, prefix=f"pages/{index:04d}/")
+
+        limits = crawl_limits()
+        summary = await crawl(
+            url,
+            max_depth=min(max(0, max_depth), limits["max_depth"]),
+            max_pages=min(max(1, max_pages), limits["max_pages"]),
+            restrict_to_domain=same_domain,
+            concurrency=min(max(1, concurrency), limits["concurrency"]),
+            on_page=package_page,
+        )
+        pages_ok = sum(1 for page in summary if page["status"] == "success")
+        if pages_ok == 0:
+            errors = [page["error"] for page in summary if page.get("error")]
+            return {"status": "error", "message": errors[0] if errors else "No pages could be scraped"}
+
+        builder.add("crawl_manifest.csv", pd.DataFrame(summary).to_csv(index=False))
+
+        zip_key = generate_s3_key(file_type="web_scraper/crawl", file_name="result.zip")
+        zip_bytes = await run_in_threadpool(builder.build)
+        upload = await run_in_threadpool(upload_queue.submit, bucket_name, zip_key, zip_bytes)
+        await run_in_threadpool(_record_document, url, sha256_of(url), bucket_name, zip_key, "crawl", started,
+                                output_size=len(zip_bytes))
+        download_url = storage.presigned_url(bucket_name, zip_key)
+
+        return {
+            "status": "success",
+            "download_url": download_url,
+            "s3_key": zip_key,
+            "upload_status": upload["state"],
+            "pages_scraped": pages_ok,
+            "pages_visited": len(summary),
+            "message": "The crawl archive has been stored in S3 and is available for download."
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@app.post(
+    "/scrape_diffbot",
+    dependencies=[Depends(admission_dependency(admission["scrape_diffbot"]))]
+)
 async def scrape_diffbot(
     url: str = Form(...),
     bucket_name: str = Form(default="bigdata-project1-storage")
@@ -249,9 +648,10 @@ async def scrape_diffbot(
     Returns:
     - JSON response with status, message, and a download link if successful.
     """
+    started = time.perf_counter()
     try:
         # Step 1: Scrape the webpage using Diffbot API
-        data = scrape_url_with_diffbot(url)
+        data = await run_in_threadpool(scrape_url_with_diffbot, url)
 
         # Handle potential errors from the scraping function
         if "error" in data:
@@ -267,10 +667,8 @@ async def scrape_diffbot(
         markdown_content += "\n```\n"
 
         # Step 3: Create an in-memory ZIP archive
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-            # Add the Markdown file into the ZIP
-            zf.writestr("scraped_data.md", markdown_content)
+        builder = ArchiveBuilder()
+        builder.add("scraped_data.md", markdown_content)
 
         # Step 4: Define S3 upload path
         s3_prefix = "web_scraper/enterprise"
@@ -280,15 +678,19 @@ async def scrape_diffbot(
         zip_key = generate_s3_key(file_type=s3_prefix, file_name=zip_filename)
 
         # Step 5: Upload ZIP file to S3
-        zip_buffer.seek(0)
-        upload_to_s3(bucket_name, zip_key, zip_buffer.getvalue())
+        zip_bytes = await run_in_threadpool(builder.build)
+        upload = await run_in_threadpool(upload_queue.submit, bucket_name, zip_key, zip_bytes)
+        await run_in_threadpool(_record_document, url, sha256_of(url), bucket_name, zip_key, "diffbot",
+                                started, output_size=len(zip_bytes))
 
         # Step 6: Generate a presigned URL for downloading the ZIP file
-        download_url = generate_presigned_url(bucket_name, zip_key)
+        download_url = storage.presigned_url(bucket_name, zip_key)
 
         return {
             "status": "success",
             "download_url": download_url,
+            "s3_key": zip_key,
+            "upload_status": upload["state"],
             "message": "Scraped data has been stored in S3. You can download the markdown file using the provided link."
         }
 
@@ -296,6 +698,59 @@ async def scrape_diffbot(
         # Handle unexpected errors
         return {"status": "error", "message": str(e)}
 
+@app.get("/documents")
+async def list_documents(
+    name: Optional[str] = None,
+    sha256: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 100
+) -> Dict[str, Any]:
+    """
+    Look up previously processed documents in the local manifest index (no S3 LIST calls).
+
+    Parameters:
+    - name (str): Exact uploaded file name, or the URL for scraped pages.
+    - sha256 (str): SHA-256 of the uploaded file, or of the URL for scraped pages.
+    - since / until (str): Inclusive ISO-8601 date or datetime bounds; datetimes without an offset are UTC.
+    - limit (int): Maximum number of rows, newest first.
+    """
+    try:
+        documents = manifest.find(file_name=name, input_sha256=sha256, since=since, until=until, limit=limit)
+        return {"status": "success", "count": len(documents), "documents": documents}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.get("/uploads/{s3_key:path}")
+async def upload_status(s3_key: str) -> Dict[str, Any]:
+    """
+    Report whether a result archive returned by another endpoint has been written to storage.
+    upload_status is one of "pending", "uploading", "durable" or "failed".
+    """
+    status = upload_queue.status(s3_key)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload: {s3_key}")
+    return {
+        "status": "success",
+        "s3_key": s3_key,
+        "upload_status": status["state"],
+        "attempts": status["attempts"],
+        "error": status["error"],
+        "updated_at": status["updated_at"],
+    }
+
+@app.get("/metrics")
+async def metrics() -> Dict[str, Any]:
+    """
+    Load-shedding and background work metrics: per-endpoint in-flight requests, queue depth,
+    admitted/rejected counters and limits, running/waiting batch jobs, plus upload queue state counts.
+    """
+    return {
+        "admission": {name: controller.metrics() for name, controller in admission.items()},
+        "batch_jobs": {name: slots.metrics() for name, slots in batch_jobs.items()},
+        "uploads": upload_queue.stats(),
+    }
+
 # Run FastAPI server when script is executed directly
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8080)
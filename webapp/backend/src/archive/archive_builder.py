@@ -0,0 +1,276 @@
+import io
+import math
+import mimetypes
+import os
+import struct
+import time
+import zipfile
+import zlib
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+# Optional zstd support: Python 3.14 ships compression.zstd, older interpreters
+# can use the third-party "zstandard" package if it is installed.
+try:
+    from compression import zstd as _zstd
+
+    def _zstd_compress(data: bytes, level: int) -> bytes:
+        return _zstd.compress(data, level=level)
+except ImportError:
+    try:
+        import zstandard as _zstd
+
+        def _zstd_compress(data: bytes, level: int) -> bytes:
+            return _zstd.ZstdCompressor(level=level).compress(data)
+    except ImportError:
+        _zstd_compress = None
+
+ZIP_STORED = zipfile.ZIP_STORED
+ZIP_DEFLATED = zipfile.ZIP_DEFLATED
+ZIP_ZSTANDARD = 93  # Method id assigned by APPNOTE 6.3.7
+
+# Formats that are already compressed; deflating them only burns CPU.
+COMPRESSED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".jp2", ".jpx", ".jbig2",
+    ".zip", ".gz", ".bz2", ".xz", ".zst", ".7z", ".rar",
+    ".mp3", ".mp4", ".mov", ".avi", ".woff", ".woff2", ".pdf",
+}
+
+ENTROPY_SAMPLE_BYTES = 64 * 1024
+ENTROPY_STORE_THRESHOLD = 7.5  # bits per byte
+MIN_COMPRESS_BYTES = 256
+
+# ZIP32 limits; sizes, offsets and entry counts that reach them get ZIP64 records.
+_ZIP32_MAX_SIZE = 0xFFFFFFFF
+_ZIP32_MAX_ENTRIES = 0xFFFF
+_ZIP64_VERSION = 45
+
+
+def default_compression_level() -> int:
+    """Compression level from ARCHIVE_COMPRESSION_LEVEL (0 = store only, 9 = smallest)."""
+    try:
+        level = int(os.environ.get("ARCHIVE_COMPRESSION_LEVEL", "6"))
+    except ValueError:
+        level = 6
+    return max(0, min(9, level))
+
+
+def zstd_available() -> bool:
+    """Return True if a zstd compressor can be loaded in this interpreter."""
+    return _zstd_compress is not None
+
+
+def shannon_entropy(data: bytes) -> float:
+    """Return the Shannon entropy of a byte string in bits per byte."""
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum((n / total) * math.log2(n / total) for n in Counter(data).values())
+
+
+def choose_compression(arcname: str, data: bytes, level: int, use_zstd: bool = False) -> int:
+    """
+    Pick a ZIP compression method for a single entry.
+
+    Entries are stored as-is when compression is disabled, when they are tiny,
+    when their extension marks an already-compressed format, or when a sample
+    of their bytes looks random. Everything else is deflated, or compressed
+    with zstd if it was requested and is available.
+    """
+    if level <= 0 or len(data) < MIN_COMPRESS_BYTES:
+        return ZIP_STORED
+
+    ext = os.path.splitext(arcname)[1].lower()
+    if ext in COMPRESSED_EXTENSIONS:
+        return ZIP_STORED
+
+    mime_type, encoding = mimetypes.guess_type(arcname)
+    if encoding is not None or (mime_type and mime_type.startswith(("image/", "video/", "audio/"))
+                                and not mime_type.endswith(("svg+xml", "bmp", "tiff"))):
+        return ZIP_STORED
+
+    if shannon_entropy(data[:ENTROPY_SAMPLE_BYTES]) >= ENTROPY_STORE_THRESHOLD:
+        return ZIP_STORED
+
+    if use_zstd and zstd_available():
+        return ZIP_ZSTANDARD
+    return ZIP_DEFLATED
+
+
+def _compress(data: bytes, method: int, level: int) -> bytes:
+    if method == ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush()
+    if method == ZIP_ZSTANDARD:
+        # Map the 0-9 deflate scale onto zstd's wider 1-19 range.
+        return _zstd_compress(data, max(1, level * 2 + 1))
+    return data
+
+
+def _zip64_extra(*values: int) -> bytes:
+    """ZIP64 extended information extra field (header id 0x0001) holding 8-byte values."""
+    return struct.pack(f"<HH{len(values)}Q", 0x0001, 8 * len(values), *values)
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+class ArchiveBuilder:
+    """
+    Build a ZIP archive, choosing a compression method per entry and
+    compressing entries in parallel threads (zlib and zstd release the GIL).
+    Archives past the ZIP32 limits (4 GiB, 65535 entries) get ZIP64 records.
+
+    Usage:
+        builder = ArchiveBuilder()
+        builder.add("docling.md", markdown)
+        builder.add_directory("images", images_dir)
+        zip_bytes = builder.build()
+    """
+
+    def __init__(self, level: Optional[int] = None, max_workers: Optional[int] = None,
+                 use_zstd: Optional[bool] = None):
+        self.level = default_compression_level() if level is None else max(0, min(9, level))
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1) + 1)
+        if use_zstd is None:
+            use_zstd = os.environ.get("ARCHIVE_USE_ZSTD", "").lower() in ("1", "true", "yes")
+        self.use_zstd = use_zstd
+        self._entries: List[Tuple[str, Union[bytes, str], bool]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, arcname: str, data: Union[bytes, str]) -> None:
+        """Add an in-memory entry; strings are encoded as UTF-8."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._entries.append((arcname, data, False))
+
+    def add_file(self, arcname: str, file_path: str) -> None:
+        """Add a file from disk; it is read lazily by the worker that compresses it."""
+        self._entries.append((arcname, file_path, True))
+
+    def add_directory(self, arc_prefix: str, directory: str) -> None:
+        """Add every file found under a directory, flattened under arc_prefix."""
+        if not directory or not os.path.exists(directory):
+            return
+        for root, _, files in os.walk(directory):
+            for file_name in sorted(files):
+                self.add_file(f"{arc_prefix}/{file_name}", os.path.join(root, file_name))
+
+    def _prepare(self, entry: Tuple[str, Union[bytes, str], bool]) -> dict:
+        arcname, payload, is_path = entry
+        if is_path:
+            with open(payload, "rb") as f:
+                data = f.read()
+        else:
+            data = payload
+
+        method = choose_compression(arcname, data, self.level, self.use_zstd)
+        compressed = _compress(data, method, self.level)
+        if method != ZIP_STORED and len(compressed) >= len(data):
+            method, compressed = ZIP_STORED, data
+
+        return {
+            "name": arcname.encode("utf-8"),
+            "method": method,
+            "crc": zlib.crc32(data) & 0xFFFFFFFF,
+            "size": len(data),
+            "payload": compressed,
+        }
+
+    def _prepared_entries(self) -> Iterator[dict]:
+        """
+        Compressed entries in insertion order. At most two per worker are
+        compressed ahead of the writer, so memory stays bounded for large archives.
+        """
+        if len(self._entries) <= 1 or self.max_workers <= 1:
+            for entry in self._entries:
+                yield self._prepare(entry)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for entry in self._entries:
+                pending.append(executor.submit(self._prepare, entry))
+                if len(pending) >= 2 * self.max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def build(self) -> bytes:
+        """Compress all entries and return the finished archive as bytes."""
+        out = io.BytesIO()
+        self.write_to(out)
+        return out.getvalue()
+
+    def write_to(self, out: BinaryIO) -> int:
+        """Compress all entries and stream the archive into a binary file object; returns its size."""
+        return self._write(self._prepared_entries(), out)
+
+    def _write(self, prepared: Iterator[dict], out: BinaryIO) -> int:
+        """Write pre-compressed entries, adding ZIP64 fields wherever a ZIP32 field would overflow."""
+        dos_time, dos_date = _dos_datetime(time.time())
+        central = []
+        position = 0
+
+        for p in prepared:
+            offset = position
+            size, compressed_size = p["size"], len(p["payload"])
+            large = size >= _ZIP32_MAX_SIZE or compressed_size >= _ZIP32_MAX_SIZE
+            needs_zip64 = large or offset >= _ZIP32_MAX_SIZE
+            version = 63 if p["method"] == ZIP_ZSTANDARD else _ZIP64_VERSION if needs_zip64 else 20
+            flags = 0x0800  # Names are UTF-8
+
+            # The local header carries both sizes in its ZIP64 field when either overflows
+            local_extra = _zip64_extra(size, compressed_size) if large else b""
+            header = struct.pack(
+                "<IHHHHHIIIHH", 0x04034B50, version, flags, p["method"], dos_time, dos_date, p["crc"],
+                0xFFFFFFFF if large else compressed_size, 0xFFFFFFFF if large else size,
+                len(p["name"]), len(local_extra),
+            )
+            out.write(header)
+            out.write(p["name"])
+            out.write(local_extra)
+            out.write(p["payload"])
+            position += len(header) + len(p["name"]) + len(local_extra) + compressed_size
+
+            # The central record lists only the overflowing values, in APPNOTE order
+            overflow = [value for value in (size, compressed_size, offset) if value >= _ZIP32_MAX_SIZE]
+            central_extra = _zip64_extra(*overflow) if overflow else b""
+            central.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | version, version, flags, p["method"],
+                dos_time, dos_date, p["crc"],
+                compressed_size if compressed_size < _ZIP32_MAX_SIZE else 0xFFFFFFFF,
+                size if size < _ZIP32_MAX_SIZE else 0xFFFFFFFF,
+                len(p["name"]), len(central_extra), 0, 0, 0, 0o644 << 16,
+                offset if offset < _ZIP32_MAX_SIZE else 0xFFFFFFFF,
+            ) + p["name"] + central_extra)
+
+        cd_offset = position
+        for record in central:
+            out.write(record)
+        cd_size = sum(len(record) for record in central)
+        position += cd_size
+
+        count = len(central)
+        if count >= _ZIP32_MAX_ENTRIES or cd_size >= _ZIP32_MAX_SIZE or cd_offset >= _ZIP32_MAX_SIZE:
+            # ZIP64 end of central directory record, then its locator
+            out.write(struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, (3 << 8) | _ZIP64_VERSION, _ZIP64_VERSION, 0, 0,
+                count, count, cd_size, cd_offset,
+            ))
+            out.write(struct.pack("<IIQI", 0x07064B50, 0, position, 1))
+            position += 56 + 20
+        out.write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0,
+            count if count < _ZIP32_MAX_ENTRIES else 0xFFFF, count if count < _ZIP32_MAX_ENTRIES else 0xFFFF,
+            cd_size if cd_size < _ZIP32_MAX_SIZE else 0xFFFFFFFF,
+            cd_offset if cd_offset < _ZIP32_MAX_SIZE else 0xFFFFFFFF, 0,
+        ))
+        return position + 22
@@ -0,0 +1,205 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from archive.archive_builder import ArchiveBuilder
+from extraction.pdf_parser_opensource import process_pdf_with_open_source
+from extraction.pipeline import mark_batch_worker
+
+logger = logging.getLogger(__name__)
+
+
+def default_batch_workers() -> int:
+    """Worker processes for batch jobs (BATCH_WORKERS, defaulting to the CPU count)."""
+    return max(1, int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1)))
+
+
+def default_zip_max_members() -> int:
+    """PDFs unpacked from the ZIPs of one batch (BATCH_ZIP_MAX_MEMBERS, 1000 by default)."""
+    return int(os.environ.get("BATCH_ZIP_MAX_MEMBERS", 1000))
+
+
+def default_zip_max_bytes() -> int:
+    """Uncompressed bytes unpacked from the ZIPs of one batch (BATCH_ZIP_MAX_BYTES, 2 GB by default)."""
+    return int(os.environ.get("BATCH_ZIP_MAX_BYTES", 2 * 1024 ** 3))
+
+
+def expand_inputs(uploads: List[Tuple[str, str]], work_dir: str, max_members: Optional[int] = None,
+                  max_bytes: Optional[int] = None) -> List[Tuple[str, str]]:
+    """
+    Turn uploaded (file name, path) pairs into a flat list of PDFs, unpacking any
+    ZIP archives into work_dir. Non-PDF members of a ZIP are ignored.
+
+    Raises ValueError, before unpacking anything more, once the ZIPs hold more than
+    max_members PDFs or max_bytes of uncompressed PDFs in total.
+    """
+    max_members = default_zip_max_members() if max_members is None else max_members
+    max_bytes = default_zip_max_bytes() if max_bytes is None else max_bytes
+    documents = []
+    unpacked_members = unpacked_bytes = 0
+    for name, path in uploads:
+        if not name.lower().endswith(".zip"):
+            documents.append((name, path))
+            continue
+        try:
+            with zipfile.ZipFile(path) as archive:
+                members = [m for m in archive.infolist()
+                           if not m.is_dir() and m.filename.lower().endswith(".pdf")]
+                # Sizes come from the central directory; extraction never yields more than declared
+                unpacked_members += len(members)
+                unpacked_bytes += sum(m.file_size for m in members)
+                if unpacked_members > max_members:
+                    raise ValueError(f"{name}: the ZIP archives hold more than {max_members} PDFs")
+                if unpacked_bytes > max_bytes:
+                    raise ValueError(f"{name}: the ZIP archives unpack to more than {max_bytes} bytes")
+                for member in members:
+                    # Flatten member paths so nothing can be written outside work_dir
+                    target = os.path.join(work_dir, f"{len(documents):05d}_{os.path.basename(member.filename)}")
+                    with archive.open(member) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    documents.append((os.path.basename(member.filename), target))
+        except zipfile.BadZipFile:
+            # Keep it in the list; the worker will report it as a failed document
+            documents.append((name, path))
+    return documents
+
+
+def _new_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawned, not forked: forking the server would copy its threads' locks in whatever state they
+    # are in. Workers run their pipeline stages on threads instead of nesting another process pool.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=mark_batch_worker)
+
+
+def _process_one(parse: Callable[..., Dict[str, Any]], pdf_path: str, text_backend: str,
+                 table_backend: str) -> Dict[str, Any]:
+    """Runs in a worker process."""
+    started = time.perf_counter()
+    parsed = parse(pdf_path, text_backend=text_backend, table_backend=table_backend)
+    parsed["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return parsed
+
+
+def run_batch(
+    documents: List[Tuple[str, str]],
+    builder: ArchiveBuilder,
+    max_workers: Optional[int] = None,
+    text_backend: str = "auto",
+    table_backend: str = "auto",
+    on_document: Optional[Callable[[Dict[str, Any]], None]] = None,
+    parse: Callable[..., Dict[str, Any]] = process_pdf_with_open_source,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Parse many PDFs with `parse` (process_pdf_with_open_source by default) on a
+    process pool. Workers are spawned, so parse must be a module-level function.
+
+    Successful results are added to the builder under documents/<index>_<name>/.
+    A failing document only produces an error entry; the rest of the batch carries on.
+    on_document is called with each document's status as it finishes.
+
+    A worker that dies (segfault, OOM kill) breaks the whole pool. When that
+    happens, the documents that were running are retried one at a time in a
+    single-worker pool, so only the one that crashes again is marked failed,
+    and everything else is resubmitted to a fresh pool.
+
+    Returns (statuses in input order, temporary directories to delete once the
+    archive has been built).
+    """
+    statuses: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+    temp_dirs: List[str] = []
+    workers = min(max_workers or default_batch_workers(), max(1, len(documents)))
+    broken_rounds: Counter = Counter()
+
+    def finish(index: int, parsed: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        name = documents[index][0]
+        status = {"index": index + 1, "file_name": name, "status": "success", "error": None,
+                  "duration_ms": None, "output_prefix": None}
+        if error is None:
+            try:
+                prefix = f"documents/{index + 1:05d}_{os.path.splitext(name)[0]}/"
+                builder.add(f"{prefix}docling.md", parsed["docling_markdown"])
+                builder.add(f"{prefix}markitdown.md", parsed["markitdown_markdown"])
+                builder.add_directory(f"{prefix}images", parsed["images_dir"])
+                builder.add_directory(f"{prefix}tables", parsed["tables_dir"])
+                temp_dirs.extend([parsed["images_dir"], parsed["tables_dir"]])
+                status.update(duration_ms=parsed["duration_ms"], output_prefix=prefix)
+            except Exception as e:
+                error = str(e)
+        if error is not None:
+            logger.warning(f"Batch document {name} failed: {error}")
+            status.update(status="error", error=error)
+        statuses[index] = status
+        if on_document:
+            on_document(status)
+
+    pending = list(range(len(documents)))
+    while pending:
+        unfinished, running = _run_round(documents, pending, workers, parse, text_backend, table_backend, finish)
+        if not unfinished:
+            break
+        broken_rounds.update(unfinished)
+        # Documents seen running when the pool broke are the suspects. A document caught
+        # in two broken rounds is isolated as well, so every round makes progress.
+        isolate = [i for i in unfinished if i in running or broken_rounds[i] > 1] or unfinished
+        _run_isolated(documents, isolate, parse, text_backend, table_backend, finish)
+        pending = [i for i in unfinished if i not in isolate]
+
+    return statuses, temp_dirs
+
+
+def _run_round(documents, indices, workers, parse, text_backend, table_backend,
+               finish) -> Tuple[List[int], Set[int]]:
+    """
+    Run documents on a pool until all finish or the pool breaks. Returns the
+    indices left unfinished by a broken pool and those that were running at the time.
+    """
+    running: Set[int] = set()
+    with _new_pool(workers) as executor:
+        futures = {
+            executor.submit(_process_one, parse, documents[index][1], text_backend, table_backend): index
+            for index in indices
+        }
+        not_done = set(futures)
+        while not_done:
+            # Poll so the set of running documents is fresh if a worker dies
+            running = {futures[f] for f in not_done if f.running()} or running
+            done, not_done = wait(not_done, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    parsed = future.result()
+                except BrokenProcessPool:
+                    continue
+                except Exception as e:
+                    finish(futures[future], None, str(e))
+                else:
+                    finish(futures[future], parsed, None)
+            if any(isinstance(f.exception(), BrokenProcessPool) for f in done):
+                unfinished = [futures[f] for f in futures
+                              if f in not_done or isinstance(f.exception(), BrokenProcessPool)]
+                return sorted(unfinished), running & set(unfinished)
+    return [], set()
+
+
+def _run_isolated(documents, indices, parse, text_backend, table_backend, finish) -> None:
+    """Run suspect documents one at a time; a crash now can only be that document's fault."""
+    executor = _new_pool(1)
+    try:
+        for index in indices:
+            future = executor.submit(_process_one, parse, documents[index][1], text_backend, table_backend)
+            try:
+                finish(index, future.result(), None)
+            except BrokenProcessPool as e:
+                finish(index, None, f"Worker process crashed: {e}")
+                executor.shutdown(wait=True)
+                executor = _new_pool(1)
+            except Exception as e:
+                finish(index, None, str(e))
+    finally:
+        executor.shutdown(wait=True)
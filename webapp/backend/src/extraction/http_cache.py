@@ -0,0 +1,227 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+import pandas as pd
+
+from utils.paths import ensure_private_dir
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored result format changes so old entries are ignored
+CACHE_FORMAT = 2
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "scrape_cache")
+SWEEP_INTERVAL = 300  # seconds between eviction sweeps triggered by store()
+ORPHAN_GRACE = 3600  # files without metadata younger than this may still be mid-write
+
+
+def use_scrape_cache() -> bool:
+    """The cache is on by default; set SCRAPE_CACHE=0 to always re-scrape."""
+    return os.environ.get("SCRAPE_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+class ScrapeCache:
+    """
+    On-disk cache of scrape results keyed by URL.
+
+    Each URL has a small JSON metadata file (ETag, Last-Modified, SHA-256 of the
+    page body) pointing to a JSON result file named after the body hash; tables
+    are stored in pandas' "split" layout and rebuilt as DataFrames on load.
+    Result files are written before the metadata is swapped in, so a reader
+    never sees metadata pointing at a missing or half-written result.
+
+    Entries older than max_age seconds are ignored and the page is fetched
+    unconditionally. store() sweeps the directory every few minutes, deleting
+    expired entries and the least recently stored ones beyond max_entries. The
+    cache directory is created private to this user (see ensure_private_dir).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.cache_dir = cache_dir or os.environ.get("SCRAPE_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_age is None:
+            max_age = float(os.environ.get("SCRAPE_CACHE_MAX_AGE", 7 * 24 * 3600))
+        if max_entries is None:
+            max_entries = int(os.environ.get("SCRAPE_CACHE_MAX_ENTRIES", 10000))
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = 0.0
+        ensure_private_dir(self.cache_dir)
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(f"{CACHE_FORMAT}:{url}".encode("utf-8")).hexdigest()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _result_path(self, key: str, content_sha256: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{content_sha256[:16]}.json")
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Metadata for a fresh entry, or None if there is no usable entry."""
+        try:
+            with open(self._meta_path(self._key(url)), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url or time.time() - entry.get("stored_at", 0) > self.max_age:
+            return None
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a cached entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load_result(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._result_path(self._key(entry["url"]), entry["content_sha256"]), encoding="utf-8") as f:
+                return _decode_result(json.load(f))
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry for {entry['url']}: {e}")
+            return None
+
+    def store(self, url: str, result: Dict[str, Any], response_headers: Mapping[str, str],
+              content_sha256: str) -> None:
+        """Save a result with the validators from the response that produced it."""
+        key = self._key(url)
+        try:
+            self._write_atomic(self._result_path(key, content_sha256),
+                               json.dumps(_encode_result(result)).encode("utf-8"))
+            self._write_meta(key, url, response_headers, content_sha256)
+            self._remove_stale_results(key, content_sha256)
+        except Exception as e:
+            # Caching is best effort; the scrape itself succeeded
+            logger.warning(f"Failed to cache scrape result for {url}: {e}")
+        self._maybe_sweep()
+
+    def refresh(self, entry: Dict[str, Any], response_headers: Mapping[str, str]) -> None:
+        """Record new validators (and reset the age) for an entry whose content did not change."""
+        try:
+            self._write_meta(self._key(entry["url"]), entry["url"], response_headers, entry["content_sha256"],
+                             fallback=entry)
+        except Exception as e:
+            logger.warning(f"Failed to refresh cache entry for {entry['url']}: {e}")
+
+    def _maybe_sweep(self) -> None:
+        with self._sweep_lock:
+            if time.time() < self._next_sweep:
+                return
+            self._next_sweep = time.time() + SWEEP_INTERVAL
+        try:
+            self.sweep()
+        except Exception as e:
+            logger.warning(f"Scrape cache sweep failed: {e}")
+
+    def sweep(self) -> int:
+        """
+        Delete entries older than max_age, then the least recently stored ones beyond
+        max_entries, plus leftovers of interrupted writes. Returns the number of entries removed.
+        """
+        now = time.time()
+        stored: Dict[str, float] = {}
+        other_files = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*")):
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            parts = os.path.basename(path).split(".")
+            # Metadata is <key>.json (rewritten whenever the entry is stored or refreshed)
+            if len(parts) == 2 and parts[1] == "json":
+                stored[parts[0]] = mtime
+            else:
+                other_files.append((path, parts[0], mtime))
+
+        by_age = sorted(stored, key=stored.get, reverse=True)
+        evicted = {key for i, key in enumerate(by_age) if i >= self.max_entries or now - stored[key] > self.max_age}
+        for key in evicted:
+            self._remove(self._meta_path(key))
+        for path, key, mtime in other_files:
+            if key in evicted or (key not in stored and now - mtime > ORPHAN_GRACE):
+                self._remove(path)
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} scrape cache entries from {self.cache_dir}")
+        return len(evicted)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for path in glob.glob(os.path.join(self.cache_dir, "*")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _write_meta(self, key: str, url: str, response_headers: Mapping[str, str], content_sha256: str,
+                    fallback: Optional[Dict[str, Any]] = None) -> None:
+        fallback = fallback or {}
+        entry = {
+            "url": url,
+            # A 304 may omit validators that are still valid, so keep the previous ones
+            "etag": response_headers.get("ETag") or fallback.get("etag"),
+            "last_modified": response_headers.get("Last-Modified") or fallback.get("last_modified"),
+            "content_sha256": content_sha256,
+            "stored_at": time.time(),
+        }
+        self._write_atomic(self._meta_path(key), json.dumps(entry).encode("utf-8"))
+
+    def _remove_stale_results(self, key: str, content_sha256: str) -> None:
+        current = self._result_path(key, content_sha256)
+        for path in glob.glob(os.path.join(self.cache_dir, f"{key}.*.json")):
+            if path != current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _encode_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """A scrape result as plain JSON data: DataFrames become {"index", "columns", "data"}."""
+    return {**result, "tables": [df.to_dict(orient="split") for df in result.get("tables") or []]}
+
+
+def _decode_result(data: Dict[str, Any]) -> Dict[str, Any]:
+    data["tables"] = [pd.DataFrame(**table) for table in data.get("tables") or []]
+    return data
+
+
+_default_cache: Optional[ScrapeCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_scrape_cache() -> ScrapeCache:
+    """Process-wide cache configured from SCRAPE_CACHE_DIR / SCRAPE_CACHE_MAX_AGE."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ScrapeCache()
+        return _default_cache
@@ -0,0 +1,172 @@
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, unquote_to_bytes
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from archive.archive_builder import ArchiveBuilder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_TIMEOUT = 10
+CHUNK_SIZE = 64 * 1024
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+
+def default_max_images() -> int:
+    """Image sources fetched per call (IMAGE_FETCH_MAX_IMAGES, 100 by default)."""
+    return int(os.environ.get("IMAGE_FETCH_MAX_IMAGES", 100))
+
+
+def default_max_total_bytes() -> int:
+    """Bytes downloaded per call across all images (IMAGE_FETCH_MAX_TOTAL_BYTES, 50 MB by default)."""
+    return int(os.environ.get("IMAGE_FETCH_MAX_TOTAL_BYTES", 50 * 1024 * 1024))
+
+
+def create_session(pool_size: int = DEFAULT_MAX_WORKERS) -> requests.Session:
+    """Create a requests session whose connection pool can serve pool_size threads at once."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def _guess_extension(url: str, content_type: Optional[str]) -> str:
+    if content_type:
+        ext = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if ext:
+            return ".jpg" if ext == ".jpe" else ext
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    return ext if 0 < len(ext) <= 6 else ".bin"
+
+
+def _decode_data_uri(src: str, max_bytes: int) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+    """Decode an inline data: URI. Returns (data, content_type, error)."""
+    header, _, payload = src[5:].partition(",")
+    content_type = header.split(";")[0] or "text/plain"
+    try:
+        data = base64.b64decode(payload) if header.endswith(";base64") else unquote_to_bytes(payload)
+    except ValueError:
+        return None, None, "Invalid data URI"
+    if len(data) > max_bytes:
+        return None, None, f"Image exceeds {max_bytes} bytes"
+    return data, content_type, None
+
+
+def _download(session: requests.Session, src: str, max_bytes: int,
+              timeout: int) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+    """Stream one image, aborting once it grows past max_bytes. Returns (data, content_type, error)."""
+    if src.startswith("data:"):
+        return _decode_data_uri(src, max_bytes)
+    try:
+        with session.get(src, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                return None, None, f"HTTP {response.status_code}"
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                return None, None, f"Image exceeds {max_bytes} bytes"
+
+            chunks = []
+            received = 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                received += len(chunk)
+                if received > max_bytes:
+                    return None, None, f"Image exceeds {max_bytes} bytes"
+                chunks.append(chunk)
+            return b"".join(chunks), response.headers.get("Content-Type"), None
+    except requests.RequestException as e:
+        return None, None, str(e)
+
+
+def fetch_images(
+    images: List[Dict[str, Any]],
+    builder: ArchiveBuilder,
+    prefix: str = "images/",
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    timeout: int = DEFAULT_TIMEOUT,
+    session: Optional[requests.Session] = None,
+    stored: Optional[Dict[str, str]] = None,
+    max_images: Optional[int] = None,
+    max_total_bytes: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Download the images described by extract_images concurrently and add them
+    to an archive under `prefix`.
+
+    Each distinct src is fetched once over a shared connection pool. Files are
+    named after the SHA-256 of their content, so identical images served from
+    different URLs are stored only once. `stored` maps content hashes to files
+    already in the archive; pass the same dict to every call that adds to one
+    archive (it may be shared by concurrent calls) to store each image once overall.
+
+    At most max_images sources are fetched and at most max_total_bytes downloaded
+    in total; images past either limit are skipped.
+
+    Returns a copy of the metadata with two extra columns per image:
+    "file" (path inside the archive, or "") and "fetch_status" ("ok", the error, or "Skipped: ...").
+    """
+    if not images:
+        return []
+    max_images = default_max_images() if max_images is None else max_images
+    max_total_bytes = default_max_total_bytes() if max_total_bytes is None else max_total_bytes
+    own_session = session is None
+    session = session or create_session(max_workers)
+
+    stored = {} if stored is None else stored
+    added = []
+    budget = {"remaining": max_total_bytes}
+    budget_lock = threading.Lock()
+    budget_skip = f"Skipped: total image budget of {max_total_bytes} bytes reached"
+
+    def fetch(src: str) -> Tuple[str, str]:
+        with budget_lock:
+            remaining = budget["remaining"]
+        if remaining <= 0:
+            return "", budget_skip
+        # Never download more than what is left of the budget
+        limit = min(max_bytes, remaining)
+        data, content_type, error = _download(session, src, limit, timeout)
+        if error:
+            return "", budget_skip if limit < max_bytes and error.startswith("Image exceeds") else error
+        with budget_lock:
+            if len(data) > budget["remaining"]:
+                return "", budget_skip
+            budget["remaining"] -= len(data)
+        digest = hashlib.sha256(data).hexdigest()
+        arcname = f"{prefix}{digest[:16]}{_guess_extension(src, content_type)}"
+        # setdefault is atomic, so exactly one thread (of any call sharing `stored`) adds the file
+        existing = stored.setdefault(digest, arcname)
+        if existing is arcname:
+            builder.add(arcname, data)
+            added.append(arcname)
+        return existing, "ok"
+
+    sources = list(dict.fromkeys(img["src"] for img in images if img.get("src")))
+    sources, skipped = sources[:max(0, max_images)], sources[max(0, max_images):]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            outcomes = dict(zip(sources, executor.map(fetch, sources)))
+    finally:
+        if own_session:
+            session.close()
+    outcomes.update((src, ("", f"Skipped: limit of {max_images} images reached")) for src in skipped)
+
+    logger.info(f"Fetched {len(sources)} image sources ({len(skipped)} over the limit), "
+                f"{len(added)} new files stored")
+    enriched = []
+    for img in images:
+        file_path, status = outcomes.get(img.get("src"), ("", "No source"))
+        enriched.append({**img, "file": file_path, "fetch_status": status})
+    return enriched
@@ -0,0 +1,100 @@
+import os
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+# A line segment counts as a ruling line if it is this close to horizontal/vertical (points)
+AXIS_TOLERANCE = 1.0
+# Both table finders (pdfplumber and PyMuPDF, "lines" strategy) need ruling edges in
+# both directions to form cells, so pages with fewer cannot yield a table.
+MIN_HORIZONTAL_EDGES = 2
+MIN_VERTICAL_EDGES = 2
+
+
+def use_page_classifier() -> bool:
+    """The pre-pass is on by default; set PAGE_CLASSIFIER=0 to run every stage on every page."""
+    return os.environ.get("PAGE_CLASSIFIER", "1").lower() not in ("0", "false", "no")
+
+
+def _count_ruling_edges(page: "fitz.Page") -> Dict[str, Any]:
+    horizontal = vertical = rects = 0
+    corners = []  # end points of every edge, for the bounding box of the ruled area
+    for path in page.get_drawings():
+        for item in path["items"]:
+            kind = item[0]
+            if kind == "l":
+                p1, p2 = item[1], item[2]
+                if abs(p1.y - p2.y) <= AXIS_TOLERANCE:
+                    horizontal += 1
+                elif abs(p1.x - p2.x) <= AXIS_TOLERANCE:
+                    vertical += 1
+                else:
+                    continue
+                corners.extend((p1, p2))
+            elif kind == "re" or (kind == "qu" and item[1].is_rectangular):
+                rects += 1
+                rect = item[1].rect if kind == "qu" else item[1]
+                corners.extend((rect.tl, rect.br))
+    # Line segments have an empty bounding box, so build it from the points
+    ruled_area = fitz.Rect(min(p.x for p in corners), min(p.y for p in corners),
+                           max(p.x for p in corners), max(p.y for p in corners)) if corners else fitz.Rect()
+    return {"horizontal_lines": horizontal, "vertical_lines": vertical, "rects": rects, "ruled_area": ruled_area}
+
+
+def classify_page(page: "fitz.Page") -> Dict[str, Any]:
+    """
+    Cheap per-page profile built from PyMuPDF metadata: vector drawing counts
+    and embedded image xrefs. No layout analysis is done.
+
+    Text is only looked at on pages that have enough ruling edges for a table,
+    and only inside the ruled area, so most pages never build a text page.
+    """
+    edges = _count_ruling_edges(page)
+    ruled_area = edges.pop("ruled_area")
+    image_count = len(page.get_images(full=True))
+
+    # Each rectangle contributes two horizontal and two vertical edges
+    horizontal_edges = edges["horizontal_lines"] + 2 * edges["rects"]
+    vertical_edges = edges["vertical_lines"] + 2 * edges["rects"]
+    ruled = horizontal_edges >= MIN_HORIZONTAL_EDGES and vertical_edges >= MIN_VERTICAL_EDGES
+
+    # A grid without text in it (a drawn frame, a chart axis) yields no table rows
+    text_blocks = None
+    if ruled:
+        blocks = page.get_text("blocks", clip=ruled_area)
+        text_blocks = sum(1 for block in blocks if block[6] == 0 and block[4].strip())
+
+    return {
+        "page": page.number + 1,
+        **edges,
+        "images": image_count,
+        "text_blocks": text_blocks,  # None when the page was ruled out by its edges alone
+        "table_candidate": ruled and text_blocks > 0,
+        "image_candidate": image_count > 0,
+    }
+
+
+def classify_pages(pdf_path: str) -> List[Dict[str, Any]]:
+    """Profile every page of a PDF; see classify_page."""
+    with fitz.open(pdf_path) as doc:
+        return [classify_page(page) for page in doc]
+
+
+def candidate_pages(profiles: Optional[List[Dict[str, Any]]], kind: str) -> Optional[List[int]]:
+    """
+    Zero-based page numbers flagged as "table" or "image" candidates.
+    None (no classification was done) means every page should be processed.
+    """
+    if profiles is None:
+        return None
+    return [p["page"] - 1 for p in profiles if p[f"{kind}_candidate"]]
+
+
+def summarize(profiles: Optional[List[Dict[str, Any]]]) -> Optional[Dict[str, int]]:
+    if profiles is None:
+        return None
+    return {
+        "pages": len(profiles),
+        "table_candidates": sum(p["table_candidate"] for p in profiles),
+        "image_candidates": sum(p["image_candidate"] for p in profiles),
+    }
@@ -0,0 +1,161 @@
+import csv
+import logging
+import os
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+AUTO = "auto"
+
+# PyMuPDF is not thread-safe and holds the GIL while it works, so threads gain nothing by
+# overlapping it. Callers that may run next to other threads hold this lock around fitz work.
+PYMUPDF_LOCK = threading.Lock()
+
+# "auto" falls back to pdfplumber when PyMuPDF's text looks unusable:
+# almost no text per page, or many undecodable glyphs (broken font encodings).
+MIN_CHARS_PER_PAGE = 20
+MAX_REPLACEMENT_CHAR_RATIO = 0.01
+
+
+def _write_table_csv(output_dir: str, page_num: int, t_idx: int, rows: List[list]) -> None:
+    csv_filename = f"page{page_num+1}_table{t_idx+1}.csv"
+    with open(os.path.join(output_dir, csv_filename), "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerows(rows)
+
+
+class PyMuPDFBackend:
+    """Fast backend built on PyMuPDF's native text extraction and table finder."""
+
+    name = "pymupdf"
+
+    def extract_text(self, pdf_path: str) -> str:
+        lines = []
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                text = page.get_text("text")
+                if text and text.strip():
+                    lines.append(text.strip())
+        return "\n".join(lines)
+
+    @staticmethod
+    def supports_tables() -> bool:
+        # Page.find_tables was added in PyMuPDF 1.23
+        return hasattr(fitz.Page, "find_tables")
+
+    def extract_tables(self, pdf_path: str, output_dir: str, pages: Optional[Iterable[int]] = None) -> int:
+        count = 0
+        with fitz.open(pdf_path) as doc:
+            for page_num in (range(len(doc)) if pages is None else pages):
+                tables = doc[page_num].find_tables().tables
+                logger.info(f"Page {page_num+1} - tables found: {len(tables)}")
+                for t_idx, table in enumerate(tables):
+                    _write_table_csv(output_dir, page_num, t_idx, table.extract())
+                    count += 1
+        return count
+
+
+class PdfplumberBackend:
+    """Slower pure-Python backend; more tolerant of unusual text layouts and encodings."""
+
+    name = "pdfplumber"
+
+    def extract_text(self, pdf_path: str) -> str:
+        lines = []
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                if text:
+                    lines.append(text.strip())
+        return "\n".join(lines)
+
+    @staticmethod
+    def supports_tables() -> bool:
+        return True
+
+    def extract_tables(self, pdf_path: str, output_dir: str, pages: Optional[Iterable[int]] = None) -> int:
+        count = 0
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num in (range(len(pdf.pages)) if pages is None else pages):
+                tables = pdf.pages[page_num].extract_tables()
+                logger.info(f"Page {page_num+1} - tables found: {len(tables)}")
+                for t_idx, table in enumerate(tables):
+                    _write_table_csv(output_dir, page_num, t_idx, table)
+                    count += 1
+        return count
+
+
+BACKENDS = {
+    PyMuPDFBackend.name: PyMuPDFBackend,
+    PdfplumberBackend.name: PdfplumberBackend,
+}
+
+
+def validate_backend(name: str) -> str:
+    """Normalize a backend name, raising ValueError for unknown ones."""
+    name = (name or AUTO).lower()
+    if name != AUTO and name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{name}'. Choose one of: {', '.join([AUTO, *BACKENDS])}")
+    return name
+
+
+def get_backend(name: str):
+    return BACKENDS[validate_backend(name)]()
+
+
+def text_needs_fallback(text: str, page_count: int) -> bool:
+    """Heuristic used by "auto": is this text too sparse or too garbled to trust?"""
+    if len(text.strip()) < MIN_CHARS_PER_PAGE * max(1, page_count):
+        return True
+    return text.count("\ufffd") / max(1, len(text)) > MAX_REPLACEMENT_CHAR_RATIO
+
+
+def extract_text(pdf_path: str, backend: str = AUTO) -> Tuple[str, str]:
+    """
+    Extract the text of a PDF. Returns (text, name of the backend actually used).
+    "auto" uses PyMuPDF and only re-extracts with pdfplumber when the fast result looks unusable.
+    """
+    backend = validate_backend(backend)
+    if backend != AUTO:
+        return get_backend(backend).extract_text(pdf_path), backend
+
+    try:
+        text = PyMuPDFBackend().extract_text(pdf_path)
+        with fitz.open(pdf_path) as doc:
+            page_count = len(doc)
+        if not text_needs_fallback(text, page_count):
+            return text, PyMuPDFBackend.name
+    except Exception as e:
+        logger.warning(f"PyMuPDF text extraction failed, falling back to pdfplumber: {e}")
+        text = ""
+
+    fallback = PdfplumberBackend().extract_text(pdf_path)
+    # Scanned documents have no text layer at all; keep whichever result has more
+    if len(fallback.strip()) >= len(text.strip()):
+        return fallback, PdfplumberBackend.name
+    return text, PyMuPDFBackend.name
+
+
+def extract_tables(pdf_path: str, output_dir: str, backend: str = AUTO,
+                   pages: Optional[Iterable[int]] = None) -> Tuple[int, str]:
+    """
+    Write every table found to output_dir as page<N>_table<M>.csv.
+    Returns (number of tables, name of the backend actually used).
+    "auto" prefers PyMuPDF's table finder and uses pdfplumber if it is unavailable or fails.
+    """
+    backend = validate_backend(backend)
+    if backend != AUTO:
+        return get_backend(backend).extract_tables(pdf_path, output_dir, pages), backend
+
+    if PyMuPDFBackend.supports_tables():
+        try:
+            return PyMuPDFBackend().extract_tables(pdf_path, output_dir, pages), PyMuPDFBackend.name
+        except Exception as e:
+            logger.warning(f"PyMuPDF table extraction failed, falling back to pdfplumber: {e}")
+            for file_name in os.listdir(output_dir):
+                os.remove(os.path.join(output_dir, file_name))
+    return PdfplumberBackend().extract_tables(pdf_path, output_dir, pages), PdfplumberBackend.name
@@ -1,23 +1,33 @@
 import os
 import tempfile
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 import requests
 import fitz  # PyMuPDF
-import pdfplumber
-import csv
 import shutil
 
 from standardization.docling_utils import docling_convert 
 from standardization.markitdown_utils import markitdown_convert
+from extraction.pipeline import Stage, run_stages, use_process_stages
+from extraction import pdf_backends, page_classifier
+from extraction.page_classifier import use_page_classifier
 
-def process_pdf_with_open_source(pdf_source: str) -> Dict[str, Any]:
+def process_pdf_with_open_source(pdf_source: str, text_backend: str = "auto",
+                                 table_backend: str = "auto") -> Dict[str, Any]:
     """
-    Parse PDF and return:
+    Parse PDF with the selected text/table backends ("auto", "pymupdf" or "pdfplumber") and return:
       - "docling_markdown": the string after docling conversion
       - "markitdown_markdown": the string after markitdown conversion
       - "images_dir": the directory where images are extracted
       - "tables_dir": the directory where tables (CSV) are extracted
+      - "timings": wall-clock milliseconds spent in each pipeline stage
+      - "backends": the text and table backends that were actually used
+      - "page_summary": page count and how many pages were sent to the table/image stages
     """
+    # Reject unknown backend names before doing any work
+    text_backend = pdf_backends.validate_backend(text_backend)
+    table_backend = pdf_backends.validate_backend(table_backend)
+
     # If the input is a remote URL, download it to a local temporary file
     if pdf_source.lower().startswith("http"):
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
@@ -28,49 +38,82 @@ def process_pdf_with_open_source(pdf_source: str) -> Dict[str, Any]:
         # If it is a local file, use it directly
         pdf_path = pdf_source
 
-    # Extract images to a temporary folder
     images_dir = tempfile.mkdtemp()
-    _extract_images(pdf_path, images_dir)
-
-    # Extract tables to a temporary folder
     tables_dir = tempfile.mkdtemp()
-    _extract_tables(pdf_path, tables_dir)
 
-    # Extract pure text
-    text_content = _extract_text_only(pdf_path)
+    # The PyMuPDF work runs one step at a time (see pdf_backends.PYMUPDF_LOCK): text first, so the
+    # two converters can overlap with the layout stage, where a cheap page classification decides
+    # which pages the image and table steps visit.
+    in_process = use_process_stages()
+    stages = [
+        Stage("text", _extract_text_only, args=(pdf_path, text_backend), in_process=in_process),
+        Stage("layout", _extract_layout, depends_on=("text",),
+              args=(pdf_path, images_dir, tables_dir, table_backend, use_page_classifier()), in_process=in_process),
+        Stage("docling", _convert_text, depends_on=("text",), args=(docling_convert, ".md")),
+        Stage("markitdown", _convert_text, depends_on=("text",), args=(markitdown_convert, ".txt")),
+    ]
+    try:
+        results, timings = run_stages(stages)
+    except Exception:
+        shutil.rmtree(images_dir, ignore_errors=True)
+        shutil.rmtree(tables_dir, ignore_errors=True)
+        raise
+    finally:
+        # Optionally, if you want to delete the temporary PDF, you can do it here
+        # However, if the pdf_source was a local file, it may not need to be deleted. This depends on the scenario.
+        if pdf_source.lower().startswith("http"):
+            os.remove(pdf_path)
 
-    # Optionally, if you want to delete the temporary PDF, you can do it here
-    # However, if the pdf_source was a local file, it may not need to be deleted. This depends on the scenario.
-    if pdf_source.lower().startswith("http"):
-        os.remove(pdf_path)
+    # Return relevant information
+    return {
+        "docling_markdown": results["docling"],
+        "markitdown_markdown": results["markitdown"],
+        "images_dir": images_dir,
+        "tables_dir": tables_dir,
+        "timings": {**timings, **results["layout"]["timings"]},
+        "backends": {"text": results["text"][1], "tables": results["layout"]["tables"][1]},
+        "page_summary": page_classifier.summarize(results["layout"]["profiles"])
+    }
 
-    # Write this text to a temporary .md file for docling/markitdown parsing
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".md") as tmp_file:
+def _convert_text(text_result: Tuple[str, str], convert, suffix: str) -> str:
+    """Write the extracted text to a temporary file with the given suffix and run a Markdown converter on it"""
+    text_content, _ = text_result
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
         tmp_file.write(text_content.encode("utf-8"))
         tmp_file_path = tmp_file.name
+    try:
+        return convert(tmp_file_path)
+    finally:
+        os.remove(tmp_file_path)
 
-    docling_md = docling_convert(tmp_file_path)
-    os.remove(tmp_file_path)
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp_file2:
-        tmp_file2.write(text_content.encode("utf-8"))
-        tmp_path_txt2 = tmp_file2.name
+def _extract_layout(_text_result, pdf_path: str, images_dir: str, tables_dir: str, table_backend: str,
+                    classify: bool) -> Dict[str, Any]:
+    """
+    Pipeline stage: classify pages, then extract images and tables from the candidate pages,
+    one after another under the PyMuPDF lock. Returns the page profiles, the table result
+    and the milliseconds spent in each step.
+    """
+    timings = {}
+    with pdf_backends.PYMUPDF_LOCK:
+        started = time.perf_counter()
+        # None has the image and table steps visit every page
+        profiles = page_classifier.classify_pages(pdf_path) if classify else None
+        timings["classify"] = round((time.perf_counter() - started) * 1000, 1)
 
-    markitdown_md = markitdown_convert(tmp_path_txt2)
-    os.remove(tmp_path_txt2)
+        started = time.perf_counter()
+        _extract_images(pdf_path, images_dir, page_classifier.candidate_pages(profiles, "image"))
+        timings["images"] = round((time.perf_counter() - started) * 1000, 1)
 
-    # Return relevant information
-    return {
-        "docling_markdown": docling_md,
-        "markitdown_markdown": markitdown_md,
-        "images_dir": images_dir,
-        "tables_dir": tables_dir
-    }
+        started = time.perf_counter()
+        tables = _extract_tables(pdf_path, tables_dir, table_backend,
+                                 page_classifier.candidate_pages(profiles, "table"))
+        timings["tables"] = round((time.perf_counter() - started) * 1000, 1)
+    return {"profiles": profiles, "tables": tables, "timings": timings}
 
-def _extract_images(pdf_path: str, output_dir: str):
-    """Extract all images using PyMuPDF to a specified directory"""
+def _extract_images(pdf_path: str, output_dir: str, pages: Optional[Iterable[int]] = None):
+    """Extract all images (optionally only from the given zero-based pages) using PyMuPDF to a specified directory"""
     doc = fitz.open(pdf_path)
-    for page_num in range(len(doc)):
+    for page_num in (range(len(doc)) if pages is None else pages):
         page = doc.load_page(page_num)
         for img_index, img in enumerate(page.get_images(full=True)):
             xref = img[0]
@@ -82,25 +125,12 @@ def _extract_images(pdf_path: str, output_dir: str):
                 f.write(base_image["image"])
     doc.close()
 
-def _extract_tables(pdf_path: str, output_dir: str):
-    """Extract tables using pdfplumber into CSV files"""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            tables = page.extract_tables()
-            print(f"Page {page_num+1} - tables found: {len(tables)}")  # Displaying the number of tables found
-            for t_idx, table in enumerate(tables):
-                csv_filename = f"page{page_num+1}_table{t_idx+1}.csv"
-                csv_path = os.path.join(output_dir, csv_filename)
-                with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
-                    writer = csv.writer(csv_file)
-                    writer.writerows(table)
+def _extract_tables(pdf_path: str, output_dir: str, backend: str = "auto",
+                    pages: Optional[Iterable[int]] = None) -> Tuple[int, str]:
+    """Extract tables into CSV files with the selected backend; returns (table count, backend used)"""
+    return pdf_backends.extract_tables(pdf_path, output_dir, backend, pages)
 
-def _extract_text_only(pdf_path: str) -> str:
-    """Extract text using pdfplumber and concatenate into a single string"""
-    lines = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                lines.append(text.strip())
-    return "\n".join(lines)
+def _extract_text_only(pdf_path: str, backend: str = "auto") -> Tuple[str, str]:
+    """Extract text with the selected backend into a single string; returns (text, backend used)"""
+    with pdf_backends.PYMUPDF_LOCK:
+        return pdf_backends.extract_text(pdf_path, backend)
@@ -0,0 +1,155 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """
+    One step of an extraction pipeline.
+
+    func is called with the results of the stages named in depends_on, in that
+    order, followed by `args`. Stages with in_process=True run on the shared
+    process pool (func and its arguments must then be picklable), except inside
+    batch workers; all others run on threads.
+    """
+    name: str
+    func: Callable[..., Any]
+    depends_on: Sequence[str] = ()
+    args: Tuple[Any, ...] = ()
+    in_process: bool = False
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+_in_batch_worker = False
+
+
+def mark_batch_worker() -> None:
+    """
+    Process pool initializer for batch workers. The batch pool already uses
+    every CPU, so stages inside a worker stay on threads.
+    """
+    global _in_batch_worker
+    _in_batch_worker = True
+
+
+def use_process_stages() -> bool:
+    """Whether CPU-heavy parsing stages should run in worker processes (PIPELINE_USE_PROCESSES)."""
+    if _in_batch_worker:
+        return False
+    return os.environ.get("PIPELINE_USE_PROCESSES", "").lower() in ("1", "true", "yes")
+
+
+def _get_process_pool(size: int) -> ProcessPoolExecutor:
+    """
+    One process pool per process, created on first use and shared by every
+    run_stages call. It is sized for the pipeline that creates it, so
+    concurrent pipelines queue for it instead of each starting CPU-count workers.
+
+    Workers are spawned rather than forked: stages run on threads while the pool
+    starts, and a forked child can inherit a lock another thread holds. The pool
+    is long-lived, so the slower start is paid once.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=max(1, size),
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken shared pool so the next pipeline starts a fresh one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+
+def _validate(stages: List[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError("Stage names must be unique")
+    known = set(names)
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in known]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {missing}")
+
+    # Kahn's algorithm, only to reject cycles before anything is started
+    remaining = {stage.name: set(stage.depends_on) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_stages(stages: List[Stage], max_workers: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run a DAG of stages, starting each one as soon as its dependencies have
+    finished so independent stages overlap.
+
+    Returns (results by stage name, wall-clock duration in ms by stage name).
+    If a stage raises, stages that have not started yet are cancelled and the
+    exception is re-raised once running stages have finished.
+    """
+    _validate(stages)
+    by_name = {stage.name: stage for stage in stages}
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    pending = dict(by_name)
+    running: Dict[Future, str] = {}
+    started_at: Dict[str, float] = {}
+    failure: Optional[BaseException] = None
+
+    threads = ThreadPoolExecutor(max_workers=max_workers or len(stages), thread_name_prefix="stage")
+    process_stages = sum(1 for s in stages if s.in_process)
+    processes = _get_process_pool(process_stages) if process_stages and not _in_batch_worker else None
+    try:
+        while pending or running:
+            if failure is None:
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.depends_on):
+                        dep_results = [results[dep] for dep in stage.depends_on]
+                        executor = processes if stage.in_process and processes else threads
+                        started_at[name] = time.perf_counter()
+                        running[executor.submit(stage.func, *dep_results, *stage.args)] = name
+                        del pending[name]
+            else:
+                pending.clear()
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                timings[name] = round((time.perf_counter() - started_at[name]) * 1000, 1)
+                try:
+                    results[name] = future.result()
+                except BaseException as e:
+                    logger.error(f"Pipeline stage '{name}' failed: {e}")
+                    if isinstance(e, BrokenProcessPool):
+                        _discard_process_pool(processes)
+                    failure = failure or e
+    finally:
+        # The shared process pool outlives this call
+        threads.shutdown(wait=True)
+
+    if failure is not None:
+        raise failure
+    logger.info("Stage timings (ms): " + ", ".join(f"{name}={ms}" for name, ms in timings.items()))
+    return results, timings
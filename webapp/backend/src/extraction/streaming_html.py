@@ -0,0 +1,222 @@
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import pandas as pd
+import requests
+
+CHUNK_SIZE = 64 * 1024
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+# Content of these elements is never visible text
+SKIPPED_TEXT_TAGS = {"script", "style", "noscript", "template"}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def default_max_bytes() -> int:
+    """Byte budget for streamed pages (STREAMING_MAX_BYTES, 20 MB by default)."""
+    return int(os.environ.get("STREAMING_MAX_BYTES", 20 * 1024 * 1024))
+
+
+class _Table:
+    def __init__(self):
+        self.headers: List[str] = []
+        self.first_row_td_count: Optional[int] = None
+        self.rows: List[List[str]] = []
+        self.row: Optional[List[Tuple[str, str]]] = None
+        self.cell: Optional[List[str]] = None
+        self.cell_tag: Optional[str] = None
+
+    def end_cell(self) -> None:
+        if self.cell is not None and self.row is not None:
+            text = "".join(self.cell).strip()
+            self.row.append((self.cell_tag, text))
+            if self.cell_tag == "th":
+                self.headers.append(text)
+        self.cell = None
+        self.cell_tag = None
+
+    def end_row(self) -> None:
+        self.end_cell()
+        if self.row is not None:
+            tds = [text for tag, text in self.row if tag == "td"]
+            if self.first_row_td_count is None:
+                self.first_row_td_count = len(tds)
+            if tds:
+                self.rows.append(tds)
+        self.row = None
+
+    def to_dataframe(self) -> Optional[pd.DataFrame]:
+        """Same rules as web_scraper.extract_tables: keep td rows whose width matches the header."""
+        self.end_row()
+        headers = self.headers
+        if not headers and self.first_row_td_count is not None:
+            headers = [f"Column_{i}" for i in range(self.first_row_td_count)]
+        rows = [row for row in self.rows if len(row) == len(headers)]
+        return pd.DataFrame(rows, columns=headers) if rows else None
+
+
+class StreamingHTMLExtractor(HTMLParser):
+    """
+    Incremental HTML parser that collects text, links, images and tables while
+    the document is fed chunk by chunk. Only the extracted data is kept; no
+    element tree is built.
+
+    Output formats match web_scraper's extract_clean_text / extract_urls /
+    extract_images / extract_tables, so the results can be packaged the same way.
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.text_parts: List[str] = []
+        self.urls: List[Dict[str, Any]] = []
+        self.images: List[Dict[str, Any]] = []
+        self.tables: List[pd.DataFrame] = []
+        self._skip_depth = 0
+        self._link_count = 0
+        self._image_count = 0
+        self._open_link: Optional[Dict[str, Any]] = None
+        self._link_text: List[str] = []
+        self._table_stack: List[_Table] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in SKIPPED_TEXT_TAGS:
+            self._skip_depth += 1
+        elif tag == "a":
+            self._link_count += 1
+            href = attrs.get("href")
+            self._open_link = {
+                "position": self._link_count,
+                "url": urljoin(self.base_url, href),
+                "text": "",
+                "title": attrs.get("title") or "N/A",
+            } if href else None
+            self._link_text = []
+        elif tag == "img":
+            self._image_count += 1
+            src = attrs.get("src") or ""
+            if src:
+                self.images.append({
+                    "position": self._image_count,
+                    "alt": (attrs.get("alt") or "").strip(),
+                    "src": urljoin(self.base_url, src),
+                    "width": attrs.get("width") or "N/A",
+                    "height": attrs.get("height") or "N/A",
+                })
+        elif tag == "table":
+            self._table_stack.append(_Table())
+        elif self._table_stack:
+            table = self._table_stack[-1]
+            if tag == "tr":
+                table.end_row()
+                table.row = []
+            elif tag in ("td", "th"):
+                table.end_cell()
+                if table.row is None:
+                    table.row = []
+                table.cell = []
+                table.cell_tag = tag
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TEXT_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "a":
+            self._close_link()
+        elif tag == "table" and self._table_stack:
+            df = self._table_stack.pop().to_dataframe()
+            if df is not None:
+                self.tables.append(df)
+        elif self._table_stack:
+            table = self._table_stack[-1]
+            if tag == "tr":
+                table.end_row()
+            elif tag in ("td", "th"):
+                table.end_cell()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.text_parts.append(data)
+        if self._open_link is not None:
+            self._link_text.append(data)
+        if self._table_stack and self._table_stack[-1].cell is not None:
+            self._table_stack[-1].cell.append(data)
+
+    def _close_link(self) -> None:
+        if self._open_link is not None:
+            self._open_link["text"] = "".join(self._link_text).strip()
+            self.urls.append(self._open_link)
+        self._open_link = None
+        self._link_text = []
+
+    def discard_pending(self) -> None:
+        """Drop buffered input that could not be parsed yet, e.g. a tag cut off by the byte budget."""
+        self.rawdata = ""
+
+    def close(self):
+        super().close()
+        self._close_link()
+        while self._table_stack:
+            df = self._table_stack.pop().to_dataframe()
+            if df is not None:
+                self.tables.append(df)
+
+    def clean_text(self) -> str:
+        return _WHITESPACE.sub(" ", "".join(self.text_parts)).strip()
+
+
+def stream_parse_url(url: str, max_bytes: Optional[int] = None,
+                     timeout: int = 30) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Download a page in chunks and parse each chunk as it arrives, stopping once
+    max_bytes have been read. Returns (result, error) where result holds
+    "text", "urls", "images", "tables", "bytes_read" and "truncated".
+    """
+    if max_bytes is None:
+        max_bytes = default_max_bytes()
+    if max_bytes <= 0:
+        return None, "max_bytes must be a positive number of bytes"
+    extractor = StreamingHTMLExtractor(url)
+    bytes_read = 0
+    truncated = False
+    try:
+        with requests.get(url, headers=HEADERS, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                return None, f"URL returned status code: {response.status_code}"
+            # requests assumes ISO-8859-1 when no charset is declared; UTF-8 is the better guess for HTML
+            declared = "charset" in response.headers.get("Content-Type", "").lower()
+            encoding = response.encoding if declared and response.encoding else "utf-8"
+            try:
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            except LookupError:
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+            for chunk in response.iter_content(CHUNK_SIZE):
+                remaining = max_bytes - bytes_read
+                if len(chunk) > remaining:
+                    chunk = chunk[:remaining]
+                    truncated = True
+                bytes_read += len(chunk)
+                extractor.feed(decoder.decode(chunk))
+                if truncated:
+                    extractor.discard_pending()
+                    break
+            else:
+                extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+    except Exception as e:
+        return None, f"Failed to parse URL: {str(e)}"
+
+    return {
+        "text": extractor.clean_text(),
+        "urls": extractor.urls,
+        "images": extractor.images,
+        "tables": extractor.tables,
+        "bytes_read": bytes_read,
+        "truncated": truncated,
+    }, None
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+from bs4 import BeautifulSoup
+
+from extraction.web_scraper import extract_and_convert
+from extraction.image_fetcher import create_session
+from extraction.streaming_html import CHUNK_SIZE, default_max_bytes
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_USER_AGENT = "*"
+DEFAULT_PORTS = {"http": 80, "https": 443}
+PAGE_TIMEOUT = 20  # seconds for a whole page download, not just between bytes
+
+
+def crawl_limits() -> Dict[str, int]:
+    """Server-side caps on client crawl parameters (CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES, CRAWL_MAX_CONCURRENCY)."""
+    return {
+        "max_depth": int(os.environ.get("CRAWL_MAX_DEPTH", 3)),
+        "max_pages": int(os.environ.get("CRAWL_MAX_PAGES", 100)),
+        "concurrency": int(os.environ.get("CRAWL_MAX_CONCURRENCY", 8)),
+    }
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    Normalize a URL for deduplication: lowercase scheme and host, drop default
+    ports and fragments, and use "/" for an empty path. Returns None for
+    anything that is not http(s).
+    """
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return None
+    scheme = parsed.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return None
+
+    netloc = parsed.hostname.lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{parsed.port}"
+    path = parsed.path or "/"
+    return urlunparse((scheme, netloc, path, "", parsed.query, ""))
+
+
+def same_domain(url: str, seed_url: str) -> bool:
+    """True if url is on the seed's host or one of its subdomains."""
+    host = urlparse(url).hostname or ""
+    seed_host = urlparse(seed_url).hostname or ""
+    return host == seed_host or host.endswith("." + seed_host)
+
+
+class RobotsCache:
+    """
+    Fetch and cache robots.txt rules per origin. Concurrent lookups for the same
+    origin wait for a single fetch instead of each downloading robots.txt.
+    """
+
+    def __init__(self, user_agent: str = ROBOTS_USER_AGENT, timeout: int = 5,
+                 session: Optional[requests.Session] = None):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.session = session or create_session()
+        self._parsers: Dict[str, Optional[RobotFileParser]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _load(self, origin: str) -> Optional[RobotFileParser]:
+        parser = RobotFileParser()
+        try:
+            # Same session (and User-Agent) as the page requests, so sites see one consistent client
+            response = self.session.get(f"{origin}/robots.txt", timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code in (401, 403):
+            # Same convention as urllib.robotparser: access-restricted robots.txt disallows all
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            return None
+        else:
+            parser.parse(response.text.splitlines())
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        with self._locks_guard:
+            lock = self._locks.setdefault(origin, threading.Lock())
+        with lock:
+            if origin not in self._parsers:
+                self._parsers[origin] = self._load(origin)
+            parser = self._parsers[origin]
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+
+def _available_chunks(response: requests.Response):
+    """
+    Yield body bytes as they arrive. read1 returns whatever the socket has instead of
+    waiting for a full chunk, so the deadline check below also runs for slow-drip servers.
+    """
+    if not hasattr(response.raw, "read1"):  # urllib3 < 2.3
+        yield from response.iter_content(CHUNK_SIZE)
+        return
+    while True:
+        chunk = response.raw.read1(CHUNK_SIZE, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _fetch_page(session: requests.Session, url: str, timeout: float = PAGE_TIMEOUT,
+                max_bytes: Optional[int] = None):
+    """
+    GET a page within an overall deadline and byte budget, so a server that
+    never finishes (or trickles bytes) cannot stall the crawl. Returns (body, error).
+    """
+    max_bytes = max_bytes or default_max_bytes()
+    deadline = time.monotonic() + timeout
+    try:
+        with session.get(url, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                return None, f"URL returned status code: {response.status_code}"
+            chunks, received = [], 0
+            for chunk in _available_chunks(response):
+                received += len(chunk)
+                if received > max_bytes:
+                    return None, f"Page exceeds {max_bytes} bytes"
+                if time.monotonic() > deadline:
+                    return None, f"Page took longer than {timeout} seconds"
+                chunks.append(chunk)
+            return b"".join(chunks), None
+    except requests.RequestException as e:
+        return None, f"URL is not accessible: {str(e)}"
+
+
+def _scrape_page(session: requests.Session, url: str) -> Dict[str, Any]:
+    """Fetch a single page (one timed GET) and extract it with the regular scraper pipeline."""
+    body, error = _fetch_page(session, url)
+    if error:
+        return {"error": error}
+    try:
+        soup = BeautifulSoup(body, "html.parser")
+    except Exception as e:
+        return {"error": f"Failed to parse URL: {str(e)}"}
+    return extract_and_convert(soup, url)
+
+
+async def crawl(
+    seed_url: str,
+    max_depth: int = 1,
+    max_pages: int = 20,
+    restrict_to_domain: bool = True,
+    concurrency: int = 4,
+    respect_robots: bool = True,
+    on_page: Optional[Callable[[int, str, int, Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Crawl breadth-first from seed_url, following links found by extract_urls.
+
+    Pages at the same depth are fetched concurrently, bounded by `concurrency`.
+    Every fetched page is passed to on_page(index, url, depth, result) as soon
+    as it finishes and is not kept by the crawler, which only holds the link
+    frontier and the summary. Memory use for page content therefore depends on
+    on_page: /crawl_webpage adds each page to an in-memory ArchiveBuilder, so it
+    grows with max_pages until the archive is built.
+
+    Returns one summary record per visited URL:
+    {"index", "url", "depth", "status", "error"}
+    """
+    seed = normalize_url(seed_url)
+    if not seed:
+        return [{"index": 0, "url": seed_url, "depth": 0, "status": "error",
+                 "error": "Invalid URL format. Please include http:// or https://"}]
+
+    # One pooled session for robots.txt and page requests, sized for the concurrency
+    session = create_session(max(1, concurrency))
+    robots = RobotsCache(session=session) if respect_robots else None
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    seen = {seed}
+    frontier = [seed]
+    summary: List[Dict[str, Any]] = []
+    pages_fetched = 0
+
+    async def visit(url: str, depth: int) -> List[str]:
+        nonlocal pages_fetched
+        async with semaphore:
+            if robots and not await asyncio.to_thread(robots.allowed, url):
+                summary.append({"index": None, "url": url, "depth": depth,
+                                "status": "skipped", "error": "Disallowed by robots.txt"})
+                return []
+            try:
+                result = await asyncio.to_thread(_scrape_page, session, url)
+            except Exception as e:
+                result = {"error": str(e)}
+
+        pages_fetched += 1
+        index = pages_fetched
+        record = {"index": index, "url": url, "depth": depth,
+                  "status": "error" if result.get("error") else "success",
+                  "error": result.get("error")}
+        summary.append(record)
+        if on_page and record["status"] == "success":
+            on_page(index, url, depth, result)
+        return [link["url"] for link in result.get("urls") or []]
+
+    try:
+        for depth in range(max_depth + 1):
+            batch = frontier[:max(0, max_pages - pages_fetched)]
+            if not batch:
+                break
+            link_lists = await asyncio.gather(*(visit(url, depth) for url in batch))
+
+            frontier = []
+            if depth == max_depth:
+                break
+            for links in link_lists:
+                for link in links:
+                    normalized = normalize_url(link)
+                    if not normalized or normalized in seen:
+                        continue
+                    if restrict_to_domain and not same_domain(normalized, seed):
+                        continue
+                    seen.add(normalized)
+                    frontier.append(normalized)
+    finally:
+        session.close()
+
+    logger.info(f"Crawl of {seed} finished: {len(summary)} URLs visited")
+    return summary
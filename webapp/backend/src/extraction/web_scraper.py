@@ -7,10 +7,16 @@ import pdfplumber
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import re
+import time
+import hashlib
+from typing import Optional
 
 # Import existing docling and markitdown conversion tools
 from standardization.docling_utils import docling_convert
 from standardization.markitdown_utils import markitdown_convert
+from extraction.pipeline import Stage, run_stages
+from extraction.streaming_html import stream_parse_url, HEADERS
+from extraction.http_cache import ScrapeCache, get_scrape_cache, use_scrape_cache
 
 def is_valid_url(url):
     """Validate URL format and accessibility"""
@@ -105,10 +111,15 @@ def extract_tables(soup):
     except Exception:
         return None, "Table extraction failed"
 
-def scrape_url_and_convert(url: str):
+def scrape_url_and_convert(url: str, streaming: bool = False, max_bytes: Optional[int] = None,
+                           use_cache: Optional[bool] = None):
     """
     Publicly exposed scraping and conversion function:
     1) Parse URL -> Extract text, images, tables, and links
+       With streaming=True the body is parsed incrementally as it downloads, reading at
+       most max_bytes, and no BeautifulSoup tree is built (see streaming_html).
+       Otherwise the page goes through the on-disk HTTP cache (see http_cache; on unless
+       SCRAPE_CACHE=0 or use_cache=False): an unchanged page returns the stored result.
     2) Convert extracted text into docling.md and markitdown.md
     Returns:
     {
@@ -118,52 +129,137 @@ def scrape_url_and_convert(url: str):
       "images": [...],    # Metadata of images
       "tables": [DataFrame1, DataFrame2, ...],
       "urls": [...],      # Metadata of links
+      "timings": {...},   # Milliseconds spent in each extraction/conversion stage
+      "cache": "miss" / "not_modified" / "unchanged",  # Only when the cache is used
       "error": None or "xxxxx"
     }
     """
+    if streaming:
+        return _scrape_streaming(url, max_bytes)
+    if use_cache is None:
+        use_cache = use_scrape_cache()
+    if use_cache:
+        return _scrape_cached(url, get_scrape_cache())
     soup, error = parse_url(url)
     if error:
         return {"error": error}
+    return extract_and_convert(soup, url)
 
-    # Extract text
-    text_data, err_text = extract_clean_text(soup)
-    if err_text:
-        return {"error": err_text}
-
-    # Extract URLs
-    urls_data, err_urls = extract_urls(soup, url)
-    if err_urls:
-        urls_data = []
+def _scrape_cached(url: str, cache: ScrapeCache):
+    """
+    Cached variant of scrape_url_and_convert:
+    1) Send a conditional GET with the stored ETag / Last-Modified
+    2) On 304, or a 200 whose body hashes to the stored value, return the stored
+       result without parsing or converting again
+    3) Otherwise extract and convert as usual and store the result with the new validators
+    """
+    parsed_url = urlparse(url)
+    if not all([parsed_url.scheme, parsed_url.netloc]):
+        return {"error": "Invalid URL format. Please include http:// or https://"}
 
-    # Extract images metadata
-    images_data, err_imgs = extract_images(soup, url)
-    if err_imgs:
-        images_data = []
+    # The GET doubles as the accessibility check, so no separate HEAD request is sent
+    started = time.perf_counter()
+    entry = cache.lookup(url)
+    try:
+        response = requests.get(url, headers={**HEADERS, **cache.conditional_headers(entry)}, timeout=30)
+        if response.status_code == 304 and entry:
+            cached = cache.load_result(entry)
+            if cached is not None:
+                cache.refresh(entry, response.headers)
+                return _cached_result(cached, "not_modified", started)
+            entry = None
+            response = requests.get(url, headers=HEADERS, timeout=30)
+    except requests.RequestException as e:
+        return {"error": f"URL is not accessible: {str(e)}"}
+    if response.status_code != 200:
+        return {"error": f"URL returned status code: {response.status_code}"}
 
-    # Extract tables
-    tables_data, err_tables = extract_tables(soup)
-    if err_tables:
-        tables_data = []
+    # Many servers send no validators (or change them on every response), so compare the body too
+    content_sha256 = hashlib.sha256(response.content).hexdigest()
+    if entry and entry["content_sha256"] == content_sha256:
+        cached = cache.load_result(entry)
+        if cached is not None:
+            cache.refresh(entry, response.headers)
+            return _cached_result(cached, "unchanged", started)
+    fetch_ms = round((time.perf_counter() - started) * 1000, 1)
 
-    # Convert text_data to docling.md and markitdown.md
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".md") as tmp_md:
-        tmp_md.write(text_data.encode("utf-8"))
-        tmp_md_path = tmp_md.name
-
-    docling_md = ""
-    markitdown_md = ""
     try:
-        docling_md = docling_convert(tmp_md_path)
+        soup = BeautifulSoup(response.content, 'html.parser')
     except Exception as e:
-        docling_md = f"Docling conversion failed: {e}"
+        return {"error": f"Failed to parse URL: {str(e)}"}
+    result = extract_and_convert(soup, url)
+    if result.get("error"):
+        return result
+    result["timings"] = {"fetch": fetch_ms, **result["timings"]}
+    cache.store(url, result, response.headers, content_sha256)
+    result["cache"] = "miss"
+    return result
 
-    try:
-        markitdown_md = markitdown_convert(tmp_md_path)
-    except Exception as e:
-        markitdown_md = f"Markitdown conversion failed: {e}"
+def _cached_result(result, outcome: str, started: float):
+    """A stored result, with timings replaced by this request's fetch time"""
+    result["timings"] = {"fetch": round((time.perf_counter() - started) * 1000, 1)}
+    result["cache"] = outcome
+    return result
+
+def _scrape_streaming(url: str, max_bytes: Optional[int] = None):
+    """Streaming variant of scrape_url_and_convert with a bounded download size"""
+    valid, error_message = is_valid_url(url)
+    if not valid:
+        return {"error": error_message}
+
+    started = time.perf_counter()
+    parsed, error = stream_parse_url(url, max_bytes)
+    if error:
+        return {"error": error}
+    parse_ms = round((time.perf_counter() - started) * 1000, 1)
 
-    # Delete temporary file after use
-    os.remove(tmp_md_path)
+    text_result = (parsed["text"], None)
+    stages = [
+        Stage("docling", _convert_text, args=(text_result, docling_convert, "Docling")),
+        Stage("markitdown", _convert_text, args=(text_result, markitdown_convert, "Markitdown")),
+    ]
+    results, timings = run_stages(stages)
+
+    return {
+        "error": None,
+        "docling_markdown": results["docling"],
+        "markitdown_markdown": results["markitdown"],
+        "text_raw": parsed["text"],
+        "images": parsed["images"],
+        "tables": parsed["tables"],
+        "urls": parsed["urls"],
+        "timings": {"stream_parse": parse_ms, **timings},
+        "bytes_read": parsed["bytes_read"],
+        "truncated": parsed["truncated"]
+    }
+
+def extract_and_convert(soup, url: str):
+    """
+    Run text/link/image/table extraction and both Markdown conversions on an
+    already parsed page. Returns the same dictionary as scrape_url_and_convert.
+    """
+    # Text, links, images and tables are independent reads of the parsed page;
+    # both converters start as soon as the text is available.
+    stages = [
+        Stage("text", extract_clean_text, args=(soup,)),
+        Stage("urls", extract_urls, args=(soup, url)),
+        Stage("images", extract_images, args=(soup, url)),
+        Stage("tables", extract_tables, args=(soup,)),
+        Stage("docling", _convert_text, depends_on=("text",), args=(docling_convert, "Docling")),
+        Stage("markitdown", _convert_text, depends_on=("text",), args=(markitdown_convert, "Markitdown")),
+    ]
+    results, timings = run_stages(stages)
+
+    text_data, err_text = results["text"]
+    if err_text:
+        return {"error": err_text}
+
+    # Failed link/image/table extraction just yields empty lists
+    urls_data = results["urls"][0] or []
+    images_data = results["images"][0] or []
+    tables_data = results["tables"][0] or []
+    docling_md = results["docling"]
+    markitdown_md = results["markitdown"]
 
     return {
         "error": None,
@@ -172,5 +268,22 @@ def scrape_url_and_convert(url: str):
         "text_raw": text_data,
         "images": images_data,
         "tables": tables_data,
-        "urls": urls_data
+        "urls": urls_data,
+        "timings": timings
     }
+
+def _convert_text(text_result, convert, label: str) -> str:
+    """Convert extracted text to Markdown via a temporary .md file; failures become a message, not an error"""
+    text_data, err_text = text_result
+    if err_text:
+        return ""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".md") as tmp_md:
+        tmp_md.write(text_data.encode("utf-8"))
+        tmp_md_path = tmp_md.name
+    try:
+        return convert(tmp_md_path)
+    except Exception as e:
+        return f"{label} conversion failed: {e}"
+    finally:
+        # Delete temporary file after use
+        os.remove(tmp_md_path)
@@ -8,8 +8,11 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default endpoint; set DIFFBOT_API_URL to use a local stand-in (e.g. the load-test stub)
+DIFFBOT_API_URL = "https://api.diffbot.com/v3/analyze"
+
 def scrape_url_with_diffbot(url, output_file="scraped_data.md"):
-    api_url = "https://api.diffbot.com/v3/analyze"
+    api_url = os.environ.get("DIFFBOT_API_URL", DIFFBOT_API_URL)
     token = os.environ.get("DIFFBOT_TOKEN")
     
     if not token:
@@ -0,0 +1,24 @@
+import os
+import stat
+
+
+def ensure_private_dir(path: str) -> str:
+    """
+    Create a directory for service-private state (mode 0700) and refuse to use an
+    existing one that another user owns or could have written to.
+
+    Callers trust what they find in these directories (staged uploads, cached
+    results), so a directory pre-created by someone else under a shared location
+    such as /tmp must not be adopted.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"{path} is not a directory")
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise RuntimeError(f"{path} is owned by another user; refusing to use it")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise RuntimeError(f"{path} is writable by other users; refusing to use it")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
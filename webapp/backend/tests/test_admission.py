@@ -0,0 +1,98 @@
+import asyncio
+import io
+
+import fitz  # PyMuPDF
+import pytest
+
+from api import admission
+from api.admission import AdmissionController, AdmissionRejected
+
+
+async def _queued(controller: AdmissionController, cost: float = 1.0) -> asyncio.Task:
+    """Start an acquire() that has to wait, and let it join the queue."""
+    task = asyncio.create_task(controller.acquire(cost))
+    await asyncio.sleep(0)
+    return task
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1)
+        await controller.acquire()
+        waiting = await _queued(controller)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after >= 1
+
+        controller.release(1.0, 0.1)
+        await waiting
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["rejected_queue_full_total"] == 1
+    assert (metrics["in_flight"], metrics["queue_depth"], metrics["admitted_total"]) == (1, 0, 2)
+
+
+def test_queue_timeout_is_rejected_with_503():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=4, queue_timeout=0.05)
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 503
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["rejected_timeout_total"] == 1
+    assert (metrics["in_flight"], metrics["queue_depth"], metrics["queued_cost"]) == (1, 0, 0)
+
+
+def test_cancelled_waiter_leaves_the_queue_and_release_admits_the_next():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=4)
+        await controller.acquire()
+        cancelled = await _queued(controller)
+        waiting = await _queued(controller)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert controller.metrics()["queue_depth"] == 1
+
+        controller.release(1.0, 0.1)
+        await waiting
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert (metrics["in_flight"], metrics["queue_depth"], metrics["admitted_total"]) == (1, 0, 2)
+
+
+def test_large_waiter_at_the_head_unblocks_smaller_ones_when_cancelled():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=4, max_cost=10)
+        await controller.acquire(6)
+        large = await _queued(controller, 8)
+        small = await _queued(controller, 2)
+        assert controller.metrics()["queue_depth"] == 2
+
+        large.cancel()
+        await small
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert (metrics["in_flight"], metrics["in_flight_cost"], metrics["queue_depth"]) == (2, 8, 0)
+
+
+def test_pdf_cost_counts_pages_or_guesses_from_size(monkeypatch):
+    doc = fitz.open()
+    for _ in range(5):
+        doc.new_page()
+    upload = io.BytesIO(doc.tobytes())
+    size = len(upload.getvalue())
+
+    assert admission.estimate_pdf_cost(upload) == pytest.approx(5 + size / admission.BYTES_PER_COST_UNIT)
+    assert upload.tell() == 0
+
+    monkeypatch.setattr(admission, "PAGE_COUNT_MAX_BYTES", size - 1)
+    guessed = size / admission.BYTES_PER_PAGE_GUESS + size / admission.BYTES_PER_COST_UNIT
+    assert admission.estimate_pdf_cost(upload) == pytest.approx(max(1.0, guessed))
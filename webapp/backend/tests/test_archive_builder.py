@@ -0,0 +1,120 @@
+import io
+import os
+import shutil
+import subprocess
+import zipfile
+
+import pytest
+
+from archive import archive_builder
+from archive.archive_builder import ArchiveBuilder, ZIP_DEFLATED, ZIP_STORED
+
+TEXT = ("lorem ipsum dolor sit amet " * 400).encode("utf-8")
+RANDOM = os.urandom(4096)
+
+
+def _sample_builder(tmp_path) -> ArchiveBuilder:
+    images = tmp_path / "images"
+    images.mkdir()
+    (images / "figure.png").write_bytes(RANDOM)
+    (tmp_path / "notes.txt").write_bytes(TEXT)
+
+    builder = ArchiveBuilder(level=6)
+    builder.add("docling.md", TEXT.decode("utf-8"))
+    builder.add("random.bin", RANDOM)
+    builder.add("empty.txt", b"")
+    builder.add("tiny.txt", b"hi")
+    builder.add("tables/tablé_ü_表.csv", "a,b\n1,2\n")
+    builder.add_file("notes.txt", str(tmp_path / "notes.txt"))
+    builder.add_directory("images", str(images))
+    return builder
+
+
+EXPECTED = {
+    "docling.md": (TEXT, ZIP_DEFLATED),
+    "random.bin": (RANDOM, ZIP_STORED),
+    "empty.txt": (b"", ZIP_STORED),
+    "tiny.txt": (b"hi", ZIP_STORED),
+    "tables/tablé_ü_表.csv": (b"a,b\n1,2\n", ZIP_STORED),
+    "notes.txt": (TEXT, ZIP_DEFLATED),
+    "images/figure.png": (RANDOM, ZIP_STORED),
+}
+
+
+def test_round_trip_through_zipfile(tmp_path):
+    data = _sample_builder(tmp_path).build()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        infos = {info.filename: info for info in zf.infolist()}
+        assert list(infos) == list(EXPECTED)
+        for name, (content, method) in EXPECTED.items():
+            assert zf.read(name) == content
+            assert infos[name].compress_type == method
+            assert infos[name].flag_bits & 0x0800  # UTF-8 names
+
+
+def test_compressed_entries_are_smaller(tmp_path):
+    data = _sample_builder(tmp_path).build()
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        info = zf.getinfo("docling.md")
+        assert info.compress_size < info.file_size
+
+
+def test_level_zero_stores_everything(tmp_path):
+    builder = ArchiveBuilder(level=0)
+    builder.add("docling.md", TEXT)
+    with zipfile.ZipFile(io.BytesIO(builder.build())) as zf:
+        assert zf.getinfo("docling.md").compress_type == ZIP_STORED
+        assert zf.read("docling.md") == TEXT
+
+
+def test_empty_archive():
+    with zipfile.ZipFile(io.BytesIO(ArchiveBuilder().build())) as zf:
+        assert zf.namelist() == []
+
+
+@pytest.mark.skipif(shutil.which("unzip") is None, reason="unzip is not installed")
+def test_unzip_accepts_archive(tmp_path):
+    archive = tmp_path / "result.zip"
+    archive.write_bytes(_sample_builder(tmp_path).build())
+    result = subprocess.run(["unzip", "-t", str(archive)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "No errors detected" in result.stdout
+
+
+def _check_zip64(data: bytes, tmp_path) -> None:
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == list(EXPECTED)
+        for name, (content, method) in EXPECTED.items():
+            assert zf.read(name) == content
+            # Entries keep the method they were compressed with; nothing is re-encoded
+            assert zf.getinfo(name).compress_type == method
+    if shutil.which("unzip"):
+        archive = tmp_path / "zip64.zip"
+        archive.write_bytes(data)
+        result = subprocess.run(["unzip", "-t", str(archive)], capture_output=True, text=True)
+        assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_zip64_entry_count(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_builder, "_ZIP32_MAX_ENTRIES", 3)
+    data = _sample_builder(tmp_path).build()
+    assert b"PK\x06\x06" in data and b"PK\x06\x07" in data  # ZIP64 end record and locator
+    _check_zip64(data, tmp_path)
+
+
+def test_zip64_sizes_and_offsets(tmp_path, monkeypatch):
+    # Every size and offset past 64 bytes is written through ZIP64 extra fields
+    monkeypatch.setattr(archive_builder, "_ZIP32_MAX_SIZE", 64)
+    _check_zip64(_sample_builder(tmp_path).build(), tmp_path)
+
+
+def test_write_to_file(tmp_path):
+    path = tmp_path / "result.zip"
+    with open(path, "wb") as f:
+        size = _sample_builder(tmp_path).write_to(f)
+    assert size == path.stat().st_size
+    with zipfile.ZipFile(path) as zf:
+        assert zf.namelist() == list(EXPECTED)
@@ -0,0 +1,66 @@
+import os
+import zipfile
+
+import pytest
+
+from archive.archive_builder import ArchiveBuilder
+from extraction import batch_processor
+
+
+def _fake_parse(pdf_path, text_backend="auto", table_backend="auto"):
+    # Module-level so spawned workers can import it by name
+    name = os.path.basename(pdf_path)
+    if name.startswith("crash"):
+        os._exit(1)  # simulates a segfault or OOM kill in the worker
+    if name.startswith("bad"):
+        raise ValueError("not a PDF")
+    return {"docling_markdown": f"# {name}", "markitdown_markdown": name,
+            "images_dir": os.path.join(os.path.dirname(pdf_path), "missing_images"),
+            "tables_dir": os.path.join(os.path.dirname(pdf_path), "missing_tables")}
+
+
+@pytest.fixture
+def documents(tmp_path):
+    def make(*names):
+        return [(name, str(tmp_path / name)) for name in names]
+    return make
+
+
+def test_run_batch_reports_each_document(documents):
+    docs = documents("a.pdf", "bad.pdf", "c.pdf")
+    seen = []
+    statuses, _ = batch_processor.run_batch(docs, ArchiveBuilder(), max_workers=2, on_document=seen.append,
+                                            parse=_fake_parse)
+
+    assert [s["status"] for s in statuses] == ["success", "error", "success"]
+    assert statuses[1]["error"] == "not a PDF"
+    assert statuses[0]["output_prefix"] == "documents/00001_a/"
+    assert sorted(s["index"] for s in seen) == [1, 2, 3]
+
+
+def test_worker_crash_only_fails_the_crashing_document(documents):
+    docs = documents("a.pdf", "b.pdf", "crash.pdf", "d.pdf", "e.pdf", "f.pdf", "g.pdf")
+    builder = ArchiveBuilder()
+    statuses, _ = batch_processor.run_batch(docs, builder, max_workers=2, parse=_fake_parse)
+
+    failed = [s["file_name"] for s in statuses if s["status"] == "error"]
+    assert failed == ["crash.pdf"]
+    assert "crashed" in statuses[2]["error"]
+    assert all(s["output_prefix"] for s in statuses if s["status"] == "success")
+
+
+def test_expand_inputs_limits_zip_contents(tmp_path):
+    archive = tmp_path / "docs.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"nested/doc{i}.pdf", b"%PDF" + b"0" * 100)
+        zf.writestr("readme.txt", b"ignored")
+    uploads = [("docs.zip", str(archive)), ("plain.pdf", str(tmp_path / "plain.pdf"))]
+
+    documents = batch_processor.expand_inputs(uploads, str(tmp_path), max_members=3, max_bytes=1000)
+    assert [name for name, _ in documents] == ["doc0.pdf", "doc1.pdf", "doc2.pdf", "plain.pdf"]
+
+    with pytest.raises(ValueError, match="more than 2 PDFs"):
+        batch_processor.expand_inputs(uploads, str(tmp_path), max_members=2, max_bytes=1000)
+    with pytest.raises(ValueError, match="more than 200 bytes"):
+        batch_processor.expand_inputs(uploads, str(tmp_path), max_members=3, max_bytes=200)
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from extraction import web_scraper
+from extraction.http_cache import ScrapeCache
+
+URL = "https://example.com/page"
+BODY = b"<html><body><p>cached page</p></body></html>"
+
+
+class _Response:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ScrapeCache(cache_dir=str(tmp_path / "cache"))
+    result = {"docling_markdown": "# cached", "tables": [pd.DataFrame({"a": [1, 2]})], "timings": {}}
+    cache.store(URL, result, {"ETag": '"v1"'}, hashlib.sha256(BODY).hexdigest())
+    return cache
+
+
+def _fake_get(monkeypatch, response):
+    sent = []
+
+    def get(url, headers=None, timeout=None):
+        sent.append(headers or {})
+        return response
+    monkeypatch.setattr(web_scraper.requests, "get", get)
+    return sent
+
+
+def test_not_modified_returns_the_stored_result(cache, monkeypatch):
+    sent = _fake_get(monkeypatch, _Response(304, headers={"ETag": '"v2"'}))
+    result = web_scraper._scrape_cached(URL, cache)
+
+    assert sent[0]["If-None-Match"] == '"v1"'
+    assert result["cache"] == "not_modified"
+    assert result["docling_markdown"] == "# cached"
+    assert result["tables"][0]["a"].tolist() == [1, 2]
+    assert cache.lookup(URL)["etag"] == '"v2"'
+
+
+def test_unchanged_body_returns_the_stored_result(cache, monkeypatch):
+    _fake_get(monkeypatch, _Response(200, content=BODY))
+    result = web_scraper._scrape_cached(URL, cache)
+
+    assert result["cache"] == "unchanged"
+    assert result["docling_markdown"] == "# cached"
+    # The 200 carried no validators, so the stored ones are kept
+    assert cache.lookup(URL)["etag"] == '"v1"'
+
+
+def test_sweep_evicts_expired_and_excess_entries(tmp_path):
+    cache = ScrapeCache(cache_dir=str(tmp_path / "cache"), max_age=3600, max_entries=2)
+    for i in range(4):
+        cache.store(f"https://example.com/{i}", {"tables": []}, {}, f"{i:064x}")
+    now = time.time()
+    for i, age in enumerate([7200, 30, 20, 10]):  # /0 has expired, /1 is the oldest of the rest
+        key = cache._key(f"https://example.com/{i}")
+        for name in os.listdir(cache.cache_dir):
+            if name.startswith(key):
+                os.utime(os.path.join(cache.cache_dir, name), (now - age, now - age))
+
+    assert cache.sweep() == 2
+    assert [i for i in range(4) if cache.lookup(f"https://example.com/{i}")] == [2, 3]
+    assert len(os.listdir(cache.cache_dir)) == 4  # metadata and result for each remaining entry
@@ -0,0 +1,41 @@
+import json
+
+from S3.storage_backends import LocalFilesystemBackend
+from S3.upload_queue import DURABLE, UploadQueue
+
+
+def _queue(tmp_path) -> UploadQueue:
+    return UploadQueue(LocalFilesystemBackend(root=str(tmp_path / "store")), max_workers=2,
+                       staging_dir=str(tmp_path / "staging"))
+
+
+def test_submit_uploads_and_clears_staging(tmp_path):
+    queue = _queue(tmp_path)
+    queue.submit("bucket", "a/result.zip", b"zip bytes")
+
+    assert queue.wait("a/result.zip", timeout=10)["state"] == DURABLE
+    assert (tmp_path / "store" / "bucket" / "a" / "result.zip").read_bytes() == b"zip bytes"
+    queue.shutdown()
+    assert list((tmp_path / "staging").iterdir()) == []
+
+
+def test_recover_requeues_staged_uploads_and_drops_leftovers(tmp_path):
+    staging = tmp_path / "staging"
+    staging.mkdir(mode=0o700)
+    # A complete pair left by a previous process is uploaded again
+    (staging / "done.data").write_bytes(b"staged")
+    (staging / "done.json").write_text(json.dumps({"bucket": "bucket", "key": "b/result.zip"}))
+    # An artifact without a sidecar and an interrupted temp file are deleted
+    (staging / "orphan.data").write_bytes(b"never acknowledged")
+    (staging / "tmp123.part").write_bytes(b"half written")
+    # A sidecar whose artifact is gone is deleted too
+    (staging / "lost.json").write_text(json.dumps({"bucket": "bucket", "key": "c/result.zip"}))
+
+    queue = _queue(tmp_path)
+    assert queue.recovered == 1
+    assert queue.wait("b/result.zip", timeout=10)["state"] == DURABLE
+    queue.shutdown()
+
+    assert (tmp_path / "store" / "bucket" / "b" / "result.zip").read_bytes() == b"staged"
+    assert queue.status("c/result.zip") is None
+    assert list(staging.iterdir()) == []
@@ -1,152 +1,293 @@
+import os
+import hashlib
+import time
+
 import streamlit as st
 import requests
 import pandas as pd
-import time
-from io import BytesIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Page configuration
 st.set_page_config(layout="wide", page_title="Data Extraction Tool")
 
-# Initialize session state
+# Initialize session state: last response, cached submission and active batch job per page
 if "api_response" not in st.session_state:
     st.session_state["api_response"] = {}
+if "submission" not in st.session_state:
+    st.session_state["submission"] = {}
+if "active_job" not in st.session_state:
+    st.session_state["active_job"] = {}
 
-# FastAPI endpoint URL - update with your actual FastAPI server URL
-API_BASE_URL = "https://myapp-service-980441147674.us-east1.run.app"
+# FastAPI endpoint URL - set API_BASE_URL to use another deployment
+API_BASE_URL = os.environ.get("API_BASE_URL", "https://myapp-service-980441147674.us-east1.run.app")
+BUCKET_NAME = "bigdata-project1-storage"
+REQUEST_TIMEOUT = 600
+POLL_INTERVAL_SECONDS = 1.5
+# Cached responses hold presigned links, which the backend issues for one hour
+RESULT_TTL_SECONDS = 45 * 60
 
 # Sidebar navigation
 with st.sidebar:
     st.title("Data Extraction Tool")
-    page = st.radio("Select Operation:", 
-                    ["Enterprise Extraction", 
-                     "Open Source Extraction", 
+    page = st.radio("Select Operation:",
+                    ["Enterprise Extraction",
+                     "Open Source Extraction",
                      "Web Scrape Tool",
                      "Diffbot Scraping"])
 
-# Helper function for PDF upload and processing
-def process_pdf(endpoint, file, bucket_name="bigdata-project1-storage"):
-    files = {"file": file}
-    data = {"bucket_name": bucket_name}
+
+class BackendError(Exception):
+    """An error response from the API. Raised inside cached helpers so errors are never cached."""
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One pooled HTTP session shared by every rerun and user session of this app."""
+    session = requests.Session()
+    # Only idempotent requests are retried; uploads are never sent twice
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def content_hash(*parts) -> str:
+    """SHA-256 over bytes/str parts, used as the cache key for uploads."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _post(endpoint, data, files=None):
+    response = get_session().post(f"{API_BASE_URL}/{endpoint}", data=data, files=files, timeout=REQUEST_TIMEOUT)
+    if response.status_code in (429, 503):
+        retry_after = response.headers.get("Retry-After", "a few")
+        raise BackendError(f"The server is busy. Please retry in {retry_after} seconds.")
+    result = response.json()
+    if result.get("status") != "success":
+        raise BackendError(result.get("message") or result.get("detail") or "Unknown error")
+    return result
+
+
+def call_backend(func, *args):
+    """Run a cached helper and turn failures into the usual error response."""
     try:
-        response = requests.post(f"{API_BASE_URL}/{endpoint}", 
-                                files=files, 
-                                data=data)
-        return response.json()
+        return func(*args)
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-# Helper function for web scraping
-def scrape_webpage(url, bucket_name="bigdata-project1-storage"):
-    data = {"url": url, "bucket_name": bucket_name}
+
+def submit(page_name, func, *args):
+    """Run a cached submission helper and remember its input, so forget_submission can evict that entry."""
+    st.session_state.submission[page_name] = (func, args)
+    return call_backend(func, *args)
+
+
+def forget_submission(page_name):
+    """Drop the cached response for this page's last input only, so resubmitting it really resends it."""
+    submission = st.session_state.submission.pop(page_name, None)
+    if submission:
+        func, args = submission
+        func.clear(*args)
+
+
+# Cached submissions: reruns with the same input reuse the previous response instead of
+# uploading again. Arguments starting with "_" are not hashed; the explicit hash stands in.
+@st.cache_data(ttl=RESULT_TTL_SECONDS, show_spinner=False)
+def process_pdf(endpoint, file_hash, file_name, _content, bucket_name=BUCKET_NAME):
+    files = {"file": (file_name, _content, "application/pdf")}
+    return _post(endpoint, {"bucket_name": bucket_name}, files)
+
+
+@st.cache_data(ttl=RESULT_TTL_SECONDS, show_spinner=False)
+def submit_pdf_batch(batch_hash, _files, bucket_name=BUCKET_NAME):
+    files = [("files", (name, content, "application/octet-stream")) for name, content in _files]
+    return _post("upload_pdf_opensource_batch", {"bucket_name": bucket_name}, files)
+
+
+@st.cache_data(ttl=RESULT_TTL_SECONDS, show_spinner=False)
+def scrape_webpage(url, download_images=False, bucket_name=BUCKET_NAME):
+    return _post("scrape_webpage", {"url": url, "download_images": download_images, "bucket_name": bucket_name})
+
+
+@st.cache_data(ttl=RESULT_TTL_SECONDS, show_spinner=False)
+def submit_scrape_batch(urls, download_images=False, bucket_name=BUCKET_NAME):
+    data = {"urls": list(urls), "download_images": download_images, "bucket_name": bucket_name}
+    return _post("scrape_webpage_batch", data)
+
+
+@st.cache_data(ttl=RESULT_TTL_SECONDS, show_spinner=False)
+def scrape_diffbot(url, bucket_name=BUCKET_NAME):
+    return _post("scrape_diffbot", {"url": url, "bucket_name": bucket_name})
+
+
+def get_job(job_id):
+    """Current state of a batch job (never cached)."""
     try:
-        response = requests.post(f"{API_BASE_URL}/scrape_webpage", data=data)
+        response = get_session().get(f"{API_BASE_URL}/jobs/{job_id}", timeout=30)
+        if response.status_code == 404:
+            return {"status": "error", "message": "The server no longer knows this job. Please submit again."}
         return response.json()
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-# Helper function for Diffbot scraping
-def scrape_diffbot(url, bucket_name="bigdata-project1-storage"):
-    data = {"url": url, "bucket_name": bucket_name}
+
+def get_upload_status(s3_key):
+    """Current storage state of a result archive (never cached), or None if the server cannot tell."""
     try:
-        response = requests.post(f"{API_BASE_URL}/scrape_diffbot", 
-                                data=data)
-        return response.json()
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+        response = get_session().get(f"{API_BASE_URL}/uploads/{s3_key}", timeout=30)
+        return response.json() if response.status_code == 200 else None
+    except Exception:
+        return None
+
+
+def poll_job(page_name, job_id):
+    """
+    Show a progress bar until the job finishes. Any rerun in between stops this
+    loop; the job id stays in session state, so the next run resumes polling.
+    """
+    progress = st.progress(0.0, text="Waiting for the job to start...")
+    while True:
+        job = get_job(job_id)
+        if job.get("status") != "success" or job["state"] == "failed":
+            # e.g. the backend restarted; forget the cached submission so a retry resends it
+            forget_submission(page_name)
+            return job
+        done = job["completed"] + job["failed"]
+        progress.progress(done / max(1, job["total"]),
+                          text=f"{done} of {job['total']} processed ({job['failed']} failed) - {job['state']}")
+        if job["state"] == "completed":
+            return job
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def run_job(page_name, func, *args):
+    """Submit a batch job and track it, or report why it could not be submitted."""
+    submission = submit(page_name, func, *args)
+    if submission.get("status") == "success":
+        st.session_state.active_job[page_name] = submission["job_id"]
+        st.session_state.api_response.pop(page_name, None)
+    else:
+        st.session_state.api_response[page_name] = submission
+
+
+def show_active_job(page_name):
+    """Resume polling the page's batch job and keep the final state as its response."""
+    job_id = st.session_state.active_job.get(page_name)
+    if not job_id:
+        return
+    st.session_state.api_response[page_name] = poll_job(page_name, job_id)
+    del st.session_state.active_job[page_name]
+
+
+def show_response(page_name, success_message):
+    response = st.session_state.api_response.get(page_name)
+    if not response:
+        return
+    if "status" not in response:
+        st.error("Key 'status' not found in api_response.")
+    elif response["status"] != "success":
+        st.error(f"Error: {response.get('message', 'Unknown error')}")
+    elif "job_id" in response and response.get("state") == "failed":
+        st.error(f"Error: {response.get('error') or 'The batch job failed'}")
+    else:
+        upload = get_upload_status(response["s3_key"]) if response.get("s3_key") else None
+        upload_status = upload["upload_status"] if upload else response.get("upload_status")
+        if upload_status == "failed":
+            # The cached response points at an archive that was never stored
+            forget_submission(page_name)
+            error = (upload or response).get("error") or "upload failed"
+            st.error(f"Error: the result could not be stored: {error}")
+        else:
+            st.success(success_message)
+            st.markdown(f"Download Link: [Download]({response['download_url']})")
+            if upload_status and upload_status != "durable":
+                st.info(f"Storage upload is {upload_status}; the link works once it has been stored.")
+            if response.get("documents"):
+                st.caption(f"{response['completed']} succeeded, {response['failed']} failed")
+                st.dataframe(pd.DataFrame(response["documents"]), use_container_width=True)
+
+    if st.button("Clear Results", use_container_width=True):
+        st.session_state.api_response.pop(page_name, None)
+        st.rerun()
+
 
 # Main content area
 if page == "Enterprise Extraction":
     st.title("Enterprise PDF Extraction")
-    
+
     uploaded_file = st.file_uploader("Upload PDF file", type="pdf")
-    
+
     if uploaded_file:
         if st.button("Extract Data"):
             with st.spinner("Processing PDF..."):
-                response = process_pdf("upload_pdf_enterprise", uploaded_file)
-                st.session_state.api_response = response
-                
-    if "status" in st.session_state.api_response:
-        if st.session_state.api_response["status"] == "success":
-            st.success("Extraction Complete!")
-            st.markdown(f"Download Link: [Download]({st.session_state.api_response['download_url']})")
-        else:
-            st.error(f"Error: {st.session_state.api_response.get('message', 'Unknown error')}")
-    elif st.session_state.api_response:
-        st.error("Key 'status' not found in api_response.")
+                content = uploaded_file.getvalue()
+                response = submit(page, process_pdf, "upload_pdf_enterprise", content_hash(content),
+                                  uploaded_file.name, content)
+                st.session_state.api_response[page] = response
+
+    show_response(page, "Extraction Complete!")
 
 elif page == "Open Source Extraction":
     st.title("Open Source PDF Extraction")
-    
-    uploaded_file = st.file_uploader("Upload PDF file", type="pdf")
-    
-    if uploaded_file:
+
+    uploaded_files = st.file_uploader("Upload PDF files (or ZIP archives of PDFs)", type=["pdf", "zip"],
+                                      accept_multiple_files=True)
+
+    if uploaded_files:
         if st.button("Extract Data"):
-            with st.spinner("Processing PDF..."):
-                response = process_pdf("upload_pdf_opensource", uploaded_file)
-                st.session_state.api_response = response
-                
-    if "status" in st.session_state.api_response:
-        if st.session_state.api_response["status"] == "success":
-            st.success("Extraction Complete!")
-            st.markdown(f"Download Link: [Download]({st.session_state.api_response['download_url']})")
-        else:
-            st.error(f"Error: {st.session_state.api_response.get('message', 'Unknown error')}")
-    elif st.session_state.api_response:
-        st.error("Key 'status' not found in api_response.")
+            files = [(f.name, f.getvalue()) for f in uploaded_files]
+            if len(files) == 1 and files[0][0].lower().endswith(".pdf"):
+                name, content = files[0]
+                with st.spinner("Processing PDF..."):
+                    response = submit(page, process_pdf, "upload_pdf_opensource", content_hash(content),
+                                      name, content)
+                st.session_state.api_response[page] = response
+            else:
+                # Several files go to the batch endpoint and are tracked as a background job
+                batch_hash = content_hash(*(part for name, content in files for part in (name, content)))
+                run_job(page, submit_pdf_batch, batch_hash, files)
+
+    show_active_job(page)
+    show_response(page, "Extraction Complete!")
 
 elif page == "Web Scrape Tool":
     st.title("Web Scraping")
-    
-    with st.form(key='web_scrape_form'):  
-        url = st.text_input("Enter URL to scrape:", placeholder="https://example.com")
+
+    with st.form(key='web_scrape_form'):
+        urls_text = st.text_area("Enter URLs to scrape (one per line):", placeholder="https://example.com")
+        download_images = st.checkbox("Download images", value=False)
         submit_button = st.form_submit_button("Extract URL Data")
-        
-        if submit_button and url:
+
+        urls = list(dict.fromkeys(u.strip() for u in urls_text.splitlines() if u.strip()))
+        if submit_button and len(urls) == 1:
             with st.spinner("Scraping website..."):
-                response = scrape_webpage(url)
-                st.session_state.api_response = response
-                
-    if "status" in st.session_state.api_response:
-        if st.session_state.api_response["status"] == "success":
-            st.success("Scraping Complete!")
-            st.markdown(f"Download Link: [Download]({st.session_state.api_response['download_url']})")
-        else:
-            st.error(f"Error: {st.session_state.api_response.get('message', 'Unknown error')}")
-    elif st.session_state.api_response:
-        st.error("Key 'status' not found in api_response.")
-    
+                response = submit(page, scrape_webpage, urls[0], download_images)
+                st.session_state.api_response[page] = response
+        elif submit_button and urls:
+            run_job(page, submit_scrape_batch, tuple(urls), download_images)
 
-    if st.session_state.get('api_response') and st.button("Clear Results", use_container_width=True):
-        st.session_state.api_response = {}
-        st.experimental_rerun()
+    show_active_job(page)
+    show_response(page, "Scraping Complete!")
 
 elif page == "Diffbot Scraping":
     st.title("Diffbot Web Scraping")
-    
+
     # Use a form to capture Enter key press
     with st.form(key='diffbot_form'):
         url = st.text_input("Enter URL to scrape with Diffbot and press Enter:", placeholder="https://example.com")
         submit_button = st.form_submit_button("Scrape with Diffbot")
-        
+
         if submit_button and url:
             with st.spinner("Scraping website with Diffbot..."):
-                response = scrape_diffbot(url)
-                st.session_state.api_response = response
-                
-    if "status" in st.session_state.api_response:
-        if st.session_state.api_response["status"] == "success":
-            st.success("Scraping Complete!")
-            st.markdown(f"Download Link: [Download]({st.session_state.api_response['download_url']})")
-        else:
-            st.error(f"Error: {st.session_state.api_response.get('message', 'Unknown error')}")
-    elif st.session_state.api_response:
-        st.error("Key 'status' not found in api_response.")
-    
-    # Clear results button (outside the form)
-    if st.session_state.get('api_response') and st.button("Clear Results", use_container_width=True):
-        st.session_state.api_response = {}
-        st.experimental_rerun()
+                response = submit(page, scrape_diffbot, url.strip())
+                st.session_state.api_response[page] = response
+
+    show_response(page, "Scraping Complete!")
 
 # Footer
 st.markdown("---")